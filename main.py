@@ -12,19 +12,32 @@ Ver en tiempo real si está contando bien:
 - Cabeceos
 y mostrar un estimador simple de atención.
 
+Modos (--modo):
+- captura   : solo cámara / archivo de video (no carga MediaPipe).
+- deteccion : captura + malla de puntos del rostro.
+- completo  : pipeline entero con medidas, eventos y atención (por defecto).
+
+Con --headless no se abre ninguna ventana ni se dibuja el overlay (equipo sin
+pantalla); en ese caso se sale con Ctrl+C.
+
+Ejemplo:
+    python main.py --modo completo --camara 0 --resolucion 640x480
+
 Pulsa 'q' para salir.
 """
 
+import argparse
 import logging
+import time
 import cv2
+import numpy as np
 
 from neurodrive_vision.captura_video import CapturadorVideo, ErrorCapturaVideo
-from neurodrive_vision.detector_rostro_mediapipe import (
-    DetectorRostroMediaPipe,
-    ErrorInicializacionDetector,
-)
-from neurodrive_vision.medidas_rostro import CalculadorMedidasRostro
-from neurodrive_vision.contador_eventos import ContadorEventosSomnolencia
+
+# Los módulos de visión (MediaPipe) se importan dentro de ejecutar() solo en los
+# modos que los usan, así el modo "captura" arranca sin cargar el modelo
+
+MODOS = ("captura", "deteccion", "completo")
 
 
 def configurar_logging():
@@ -34,252 +47,399 @@ def configurar_logging():
     )
 
 
-def main():
-    configurar_logging()
+# Estilo común de todos los textos del overlay
+FUENTE = cv2.FONT_HERSHEY_SIMPLEX
+COLOR_TEXTO = (0, 255, 255)
+# Sin antialiasing por defecto: sobre la máscara negra no se nota y LINE_AA rasteriza varias veces más lento
+LINEA = cv2.LINE_8
+
+
+def dibujar_texto(imagen, texto, y, escala=0.6, grosor=2, x=10, color=COLOR_TEXTO, linea=LINEA):
+    cv2.putText(imagen, texto, (x, y), FUENTE, escala, color, grosor, linea)
+
+
+# Etiquetas fijas del overlay (texto, y). Solo el valor que va a su derecha cambia por frame.
+ETIQUETAS_OVERLAY = (
+    ("EAR prom:", 25),
+    ("MAR:", 50),
+    ("Parpadeos:", 80),
+    ("Microsuenos:", 105),
+    ("Bostezos:", 130),
+    ("Cabeceos:", 155),
+    ("Atencion:", 185),
+)
+
+
+def construir_etiquetas_eventos():
+    """
+    Texto de cada evento instantáneo (flash grande) y su máscara en
+    EventosSomnolencia.banderas. Importa contador_eventos, por eso no es
+    una constante de módulo.
+    """
+    from neurodrive_vision.contador_eventos import (
+        BIT_PARPADEO,
+        BIT_MICROSUENO,
+        BIT_BOSTEZO,
+        BIT_CABECEO,
+    )
+    return (
+        ("PARPADEO", 1 << BIT_PARPADEO),
+        ("MICROSUENO!", 1 << BIT_MICROSUENO),
+        ("BOSTEZO", 1 << BIT_BOSTEZO),
+        ("CABECEO", 1 << BIT_CABECEO),
+    )
+
+
+def construir_plantillas_overlay(ancho, alto):
+    """
+    Rasteriza una sola vez los textos que no cambian entre frames.
+
+    Devuelve la plantilla con las etiquetas de ETIQUETAS_OVERLAY, la plantilla
+    con el aviso de "sin rostro" y la coordenada x donde empieza el valor de
+    cada etiqueta.
+    """
+    plantilla_rostro = np.zeros((alto, ancho, 3), np.uint8)
+    x_valores = []
+    for etiqueta, y in ETIQUETAS_OVERLAY:
+        dibujar_texto(plantilla_rostro, etiqueta, y)
+        # El valor arranca donde seguiría "etiqueta " dibujada como un solo texto
+        # (getTextSize suma el grosor al ancho, por eso se descuenta)
+        (ancho_texto, _), _ = cv2.getTextSize(etiqueta + " ", FUENTE, 0.6, 2)
+        x_valores.append(10 + ancho_texto - 2)
+
+    plantilla_sin_rostro = np.zeros((alto, ancho, 3), np.uint8)
+    dibujar_texto(plantilla_sin_rostro, "Sin rostro detectado", 25, escala=0.7, color=(0, 0, 255))
+
+    return plantilla_rostro, plantilla_sin_rostro, x_valores
+
+
+def ejecutar(
+    modo: str = "completo",
+    indice_camara: int = 1,
+    ruta_video=None,
+    resolucion=(640, 480),
+    usar_csi: bool = False,
+    fps_deseado: int = 30,
+    detectar_cada_n: int = 2,
+    mostrar_cada_n: int = 2,
+    resolucion_inferencia=None,
+    usar_opencl: bool = False,
+    latencia_objetivo_ms=None,
+    detector_en_hilo: bool = False,
+    frames_calibracion_ear: int = 0,
+    dibujar_overlay: bool = True,
+):
+    """
+    Loop principal compartido por los tres modos (ver MODOS).
+
+    detectar_cada_n : corre MediaPipe en 1 de cada N frames. En los demás se
+    reutilizan los últimos puntos (con timestamp actualizado) para seguir
+    alimentando medidas y contador de eventos.
+    mostrar_cada_n : actualiza las ventanas (imshow + waitKey) en 1 de cada N
+    frames. waitKey cuesta al menos ~1 ms por llamada. La máscara y sus textos
+    solo se arman en esos frames.
+    detector_en_hilo : MediaPipe corre en su propio hilo sobre el frame más nuevo,
+    solapado con la captura y el resto del loop. detectar_cada_n no se usa: el
+    hilo va a su propio ritmo y mientras no hay resultado nuevo se reutiliza el último.
+    dibujar_overlay : False = modo sin pantalla. Se sigue corriendo captura,
+    detección, medidas y eventos en cada frame, pero no se dibuja ni se muestra nada.
+    El resto de los parámetros se pasan tal cual a CapturadorVideo,
+    DetectorRostroMediaPipe y ContadorEventosSomnolencia.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    if detectar_cada_n < 1 or mostrar_cada_n < 1:
+        raise ValueError(
+            f"detectar_cada_n y mostrar_cada_n deben ser >= 1 "
+            f"(se recibió {detectar_cada_n} y {mostrar_cada_n})"
+        )
+
     logger = logging.getLogger("NeuroDriveMain")
+    usar_detector = modo != "captura"
+    usar_eventos = modo == "completo"
+
+    detector_rostro = None
+    calculador_medidas = None
+    contador_eventos = None
 
     # ----- Inicializar módulos de visión -----
-    try:
-        detector_rostro = DetectorRostroMediaPipe(
-            max_rostros=1,
-            confianza_minima_deteccion=0.5,
-            confianza_minima_seguimiento=0.5,
-            refinar_contornos=True,
-            modelo_complejidad=1,
-            habilitar_cache=True,
-            max_frames_sin_deteccion=5,
+    if usar_detector:
+        from neurodrive_vision.detector_rostro_mediapipe import (
+            DetectorRostroMediaPipe,
+            ErrorInicializacionDetector,
         )
-    except ErrorInicializacionDetector as e:
-        logger.error(f"No se pudo inicializar DetectorRostroMediaPipe: {e}")
-        return
-
-    calculador_medidas = CalculadorMedidasRostro()
-    contador_eventos = ContadorEventosSomnolencia()
+        try:
+            detector_rostro = DetectorRostroMediaPipe(
+                max_rostros=1,
+                confianza_minima_deteccion=0.5,
+                confianza_minima_seguimiento=0.5,
+                refinar_contornos=True,
+                modelo_complejidad=1,
+                habilitar_cache=True,
+                max_frames_sin_deteccion=5,
+                resolucion_inferencia=resolucion_inferencia,
+                usar_opencl=usar_opencl,
+                latencia_objetivo_ms=latencia_objetivo_ms,
+                # El loop usa cada resultado antes de pedir el siguiente; con el hilo no
+                reutilizar_resultado=not detector_en_hilo,
+            )
+        except ErrorInicializacionDetector as e:
+            logger.error(f"No se pudo inicializar DetectorRostroMediaPipe: {e}")
+            return
+
+    if usar_eventos:
+        from neurodrive_vision.medidas_rostro import CalculadorMedidasRostro
+        from neurodrive_vision.contador_eventos import ContadorEventosSomnolencia
+
+        calculador_medidas = CalculadorMedidasRostro()
+        contador_eventos = ContadorEventosSomnolencia(frames_calibracion_ear=frames_calibracion_ear)
+        etiquetas_eventos = construir_etiquetas_eventos()
 
     # ----- Inicializar captura de video -----
     try:
         with CapturadorVideo(
-            indice_camara=1,
-            ruta_video=None,#"video_example.mp4"
-            resolucion=(640, 480),
-            usar_csi=False,   # en PC: False; en RPi con cámara CSI: True si configuraste el pipeline
-            fps_deseado=30,
+            indice_camara=indice_camara,
+            ruta_video=ruta_video,
+            resolucion=resolucion,
+            usar_csi=usar_csi,   # en PC: False; en RPi con cámara CSI: True si configuraste el pipeline
+            fps_deseado=fps_deseado,
         ) as capturador:
 
             logger.info("Captura de video iniciada correctamente.")
             logger.info(f"Resolución real: {capturador.obtener_resolucion()}")
-            logger.info(f"FPS reportados: {capturador.obtener_fps()}")
-
-            while True:
-                ok, frame = capturador.leer_frame()
-                if not ok:
-                    logger.warning("No se pudo leer frame. Saliendo del loop.")
-                    break
-
-                frame_original = frame.copy()
-
-                # ----- Detección de rostro + puntos -----
-                datos_rostro = detector_rostro.procesar_frame(frame)
-
-                # Generamos la máscara negra con puntos (aunque no haya rostro, devuelve negro)
-                mascara = detector_rostro.dibujar_malla(
-                    frame_bgr=frame,
-                    datos_rostro=datos_rostro,
-                    dibujar_contornos=False,
-                    dibujar_puntos=True,
-                    color_contorno=(0, 255, 255),
-                )
-
-                # Valores por defecto para textos
-                texto_ear = "EAR: N/A"
-                texto_mar = "MAR: N/A"
-
-                # ----- Cálculo de medidas geométricas -----
-                if datos_rostro.rostro_presente:
-                    medidas = calculador_medidas.calcular_medidas(datos_rostro)
-
-                    if medidas.medidas_ojos.valido and medidas.medidas_ojos.ear_promedio is not None:
-                        texto_ear = f"EAR prom: {medidas.medidas_ojos.ear_promedio:.3f}"
-
-                    if medidas.medidas_boca.valido and medidas.medidas_boca.mar is not None:
-                        texto_mar = f"MAR: {medidas.medidas_boca.mar:.3f}"
-
-                    # ----- Actualizar contador de eventos -----
-                    salida = contador_eventos.actualizar(datos_rostro.timestamp, medidas)
-
-                    # Estadísticas acumuladas
-                    stats = contador_eventos.obtener_estadisticas()
-
-                    # ----- Dibujar textos sobre la MÁSCARA -----
-                    # EAR / MAR
-                    cv2.putText(
-                        mascara,
-                        texto_ear,
-                        (10, 25),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-                    cv2.putText(
-                        mascara,
-                        texto_mar,
-                        (10, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-
-                    # Contadores de eventos
-                    cv2.putText(
-                        mascara,
-                        f"Parpadeos: {stats['parpadeos_total']}",
-                        (10, 80),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-                    cv2.putText(
-                        mascara,
-                        f"Microsuenos: {stats['microsuenos_total']}",
-                        (10, 105),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-                    cv2.putText(
-                        mascara,
-                        f"Bostezos: {stats['bostezos_total']}",
-                        (10, 130),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-                    cv2.putText(
-                        mascara,
-                        f"Cabeceos: {stats['cabeceos_total']}",
-                        (10, 155),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-
-                    # Atención
-                    cv2.putText(
-                        mascara,
-                        f"Atencion: {salida.atencion.categoria} ({salida.atencion.nivel:.2f})",
-                        (10, 185),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-
-                    # Mensaje de motivo
-                    cv2.putText(
-                        mascara,
-                        f"{salida.atencion.motivo[:50]}",
-                        (10, 210),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (0, 255, 255),
-                        1,
-                        cv2.LINE_AA,
-                    )
-
-                    # ----- Eventos instantáneos (flash grande) -----
-                    y_evento = 260
-                    if salida.eventos.parpadeo:
-                        cv2.putText(
-                            mascara,
-                            "PARPADEO",
-                            (10, y_evento),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.8,
-                            (0, 255, 255),
-                            2,
-                            cv2.LINE_AA,
-                        )
-                        y_evento += 30
-
-                    if salida.eventos.microsueno:
-                        cv2.putText(
-                            mascara,
-                            "MICROSUENO!",
-                            (10, y_evento),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.8,
-                            (0, 255, 255),
-                            2,
-                            cv2.LINE_AA,
-                        )
-                        y_evento += 30
-
-                    if salida.eventos.bostezo:
-                        cv2.putText(
-                            mascara,
-                            "BOSTEZO",
-                            (10, y_evento),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.8,
-                            (0, 255, 255),
-                            2,
-                            cv2.LINE_AA,
-                        )
-                        y_evento += 30
-
-                    if salida.eventos.cabeceo:
-                        cv2.putText(
-                            mascara,
-                            "CABECEO",
-                            (10, y_evento),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.8,
-                            (0, 255, 255),
-                            2,
-                            cv2.LINE_AA,
-                        )
-                        y_evento += 30
-
-                else:
-                    # No hay rostro -> solo texto de aviso en la máscara
-                    cv2.putText(
-                        mascara,
-                        "Sin rostro detectado",
-                        (10, 25),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.7,
-                        (0, 0, 255),
-                        2,
-                        cv2.LINE_AA,
-                    )
-
-                # ----- Mostrar ventanas -----
-                cv2.imshow("NeuroDrive - Frame Original", frame_original)
-                cv2.imshow("NeuroDrive - Mascara Eventos", mascara)
-
-                # Tecla 'q' para salir
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+            fps_captura = capturador.obtener_fps()
+            logger.info(f"FPS reportados: {fps_captura}")
+
+            if usar_eventos:
+                # Punto de partida del suavizado del EAR. El loop solo toma el frame más
+                # nuevo, así que la frecuencia real puede ser menor: el contador la mide
+                # y se corrige solo a partir de los intervalos entre llamadas
+                contador_eventos.actualizar_fps(fps_captura)
+
+            if dibujar_overlay:
+                ancho, alto = capturador.obtener_resolucion()
+                plantilla_rostro, plantilla_sin_rostro, x_valores = construir_plantillas_overlay(ancho, alto)
+
+                # Máscara reservada una sola vez; dibujar_malla la limpia y dibuja encima cada frame
+                mascara = np.zeros((alto, ancho, 3), np.uint8)
+
+            # La cámara se lee en su propio hilo; el loop consume siempre el frame más nuevo
+            capturador.iniciar_hilo()
+            if usar_detector and detector_en_hilo:
+                detector_rostro.iniciar_hilo()
+
+            frame_idx = 0
+            datos_rostro = None
+
+            # Métodos y funciones del loop resueltos una sola vez (evita lookups por frame)
+            leer_frame = capturador.leer_frame_ultimo
+            if usar_detector:
+                procesar_frame = detector_rostro.procesar_frame
+                enviar_frame = detector_rostro.enviar_frame
+                obtener_resultado = detector_rostro.obtener_resultado_ultimo
+                dibujar_malla = detector_rostro.dibujar_malla
+            if usar_eventos:
+                calcular_medidas = calculador_medidas.calcular_medidas
+                actualizar_eventos = contador_eventos.actualizar
+                obtener_estadisticas = contador_eventos.obtener_estadisticas
+            bitwise_or = cv2.bitwise_or
+            imshow = cv2.imshow
+            wait_key = cv2.waitKey
+            reloj = time.monotonic
+
+            try:
+                while True:
+                    ok, frame = leer_frame()
+                    if not ok:
+                        logger.warning("No se pudo leer frame. Saliendo del loop.")
+                        break
+
+                    # Nada del pipeline escribe sobre `frame` (el detector convierte a su propio
+                    # buffer RGB y se dibuja sobre la máscara), así que se muestra sin copiarlo
+
+                    # Solo los frames que se van a mostrar arman máscara y textos
+                    mostrar = dibujar_overlay and frame_idx % mostrar_cada_n == 0
+
+                    if usar_detector:
+                        # ----- Detección de rostro + puntos -----
+                        if detector_en_hilo:
+                            enviar_frame(frame)
+                            # Solo el primer frame espera: después se usa lo que haya listo
+                            nuevo = obtener_resultado(0.0 if datos_rostro is not None else 1.0)
+                            if nuevo is not None:
+                                datos_rostro = nuevo
+                            elif datos_rostro is None:
+                                frame_idx += 1
+                                continue
+                            # La marca del hilo es del frame enviado antes: se re-estampa al
+                            # consumirlo para que el contador nunca vea el tiempo retroceder
+                            datos_rostro.timestamp = reloj()
+                        elif datos_rostro is None or frame_idx % detectar_cada_n == 0:
+                            datos_rostro = procesar_frame(frame)
+                        else:
+                            # Frame sin inferencia: mismos puntos, tiempo actual para el contador
+                            datos_rostro.timestamp = reloj()
+
+                        if mostrar:
+                            # Generamos la máscara negra con puntos (aunque no haya rostro, devuelve negro)
+                            dibujar_malla(
+                                frame_bgr=frame,
+                                datos_rostro=datos_rostro,
+                                dibujar_contornos=False,
+                                dibujar_puntos=True,
+                                color_contorno=(0, 255, 255),
+                                out=mascara,
+                            )
+
+                        if not datos_rostro.rostro_presente:
+                            if mostrar:
+                                # No hay rostro -> solo texto de aviso en la máscara
+                                bitwise_or(mascara, plantilla_sin_rostro, dst=mascara)
+
+                        elif usar_eventos:
+                            # ----- Cálculo de medidas geométricas -----
+                            medidas = calcular_medidas(datos_rostro)
+
+                            # ----- Actualizar contador de eventos -----
+                            salida = actualizar_eventos(datos_rostro.timestamp, medidas)
+
+                            if mostrar:
+                                # Valores por defecto para textos
+                                texto_ear = "N/A"
+                                texto_mar = "N/A"
+
+                                medidas_ojos = medidas.medidas_ojos
+                                medidas_boca = medidas.medidas_boca
+                                if medidas_ojos.valido and medidas_ojos.ear_promedio is not None:
+                                    texto_ear = f"{medidas_ojos.ear_promedio:.3f}"
+
+                                if medidas_boca.valido and medidas_boca.mar is not None:
+                                    texto_mar = f"{medidas_boca.mar:.3f}"
+
+                                # Estadísticas acumuladas
+                                stats = obtener_estadisticas()
+
+                                # ----- Dibujar textos sobre la MÁSCARA -----
+                                # Las etiquetas fijas ya están en la plantilla: una sola pasada para copiarlas
+                                bitwise_or(mascara, plantilla_rostro, dst=mascara)
+
+                                valores = (
+                                    texto_ear,
+                                    texto_mar,
+                                    str(stats.parpadeos_total),
+                                    str(stats.microsuenos_total),
+                                    str(stats.bostezos_total),
+                                    str(stats.cabeceos_total),
+                                    f"{salida.atencion.categoria} ({salida.atencion.nivel:.2f})",
+                                )
+                                for valor, x_valor, (_, y) in zip(valores, x_valores, ETIQUETAS_OVERLAY):
+                                    dibujar_texto(mascara, valor, y, x=x_valor)
+
+                                # Mensaje de motivo (letra chica y fina: es el único que se ve mejor suavizado)
+                                dibujar_texto(
+                                    mascara, salida.atencion.motivo[:50], 210,
+                                    escala=0.5, grosor=1, linea=cv2.LINE_AA,
+                                )
+
+                                # ----- Eventos instantáneos (flash grande) -----
+                                # Casi todos los frames no traen ningún evento: un solo test cubre los cuatro
+                                banderas = salida.eventos.banderas
+                                if banderas:
+                                    y_evento = 260
+                                    for etiqueta, bit in etiquetas_eventos:
+                                        if banderas & bit:
+                                            dibujar_texto(mascara, etiqueta, y_evento, escala=0.8)
+                                            y_evento += 30
+
+                    # ----- Mostrar ventanas -----
+                    if mostrar:
+                        imshow("NeuroDrive - Frame Original", frame)
+                        if usar_detector:
+                            imshow("NeuroDrive - Mascara Eventos", mascara)
+
+                        # Tecla 'q' para salir
+                        if wait_key(1) & 0xFF == ord('q'):
+                            break
+
+                    frame_idx += 1
+
+            except KeyboardInterrupt:
+                # Única forma de salir sin ventana (--headless)
+                logger.info("Interrumpido por el usuario.")
 
     except ErrorCapturaVideo as e:
         logger.error(f"Error en la captura de video: {e}")
 
     finally:
-        detector_rostro.liberar()
-        cv2.destroyAllWindows()
+        if detector_rostro is not None:
+            detector_rostro.liberar()
+        # Sin overlay no se abrió ninguna ventana (y en opencv-python-headless esto lanza cv2.error)
+        if dibujar_overlay:
+            cv2.destroyAllWindows()
+
+
+def _parsear_resolucion(texto: str):
+    """Convierte "ANCHOxALTO" (ej. "640x480") en una tupla (ancho, alto)."""
+    try:
+        ancho, alto = (int(v) for v in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Resolución inválida: {texto!r} (formato ANCHOxALTO)")
+    return ancho, alto
+
+
+def _parsear_entero_positivo(texto: str) -> int:
+    """Convierte texto en un entero >= 1 (para los "1 de cada N")."""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Entero inválido: {texto!r}")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"Debe ser >= 1, se recibió {valor}")
+    return valor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NeuroDrive Vision - pruebas locales del módulo de visión")
+    parser.add_argument("--modo", choices=MODOS, default="completo",
+                        help="Qué parte del pipeline correr (por defecto: completo)")
+    parser.add_argument("--camara", type=int, default=1, help="Índice de la cámara USB")
+    parser.add_argument("--video", default=None, help="Ruta a un archivo de video (tiene prioridad sobre la cámara)")
+    parser.add_argument("--resolucion", type=_parsear_resolucion, default=(640, 480),
+                        help="Resolución de captura ANCHOxALTO")
+    parser.add_argument("--csi", action="store_true", help="Usar la cámara CSI de la Raspberry Pi (GStreamer)")
+    parser.add_argument("--fps", type=int, default=30, help="FPS pedidos a la cámara")
+    parser.add_argument("--detectar-cada-n", type=_parsear_entero_positivo, default=2, help="Correr MediaPipe en 1 de cada N frames")
+    parser.add_argument("--mostrar-cada-n", type=_parsear_entero_positivo, default=2, help="Actualizar las ventanas en 1 de cada N frames")
+    parser.add_argument("--resolucion-inferencia", type=_parsear_resolucion, default=None,
+                        help="Resolución ANCHOxALTO con la que corre MediaPipe (por defecto la de captura)")
+    parser.add_argument("--opencl", action="store_true", help="Preprocesado del detector con OpenCL si está disponible")
+    parser.add_argument("--latencia-objetivo-ms", type=float, default=None,
+                        help="Bajar la resolución de inferencia si MediaPipe tarda más que esto (por defecto escala fija)")
+    parser.add_argument("--detector-en-hilo", action="store_true",
+                        help="Correr MediaPipe en un hilo propio, solapado con la captura")
+    parser.add_argument("--calibracion-ear", type=int, default=0,
+                        help="Frames iniciales usados para calibrar los umbrales de EAR (0 = umbrales fijos)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Sin ventanas ni overlay: solo procesa (salir con Ctrl+C)")
+    args = parser.parse_args(argv)
+
+    configurar_logging()
+    ejecutar(
+        modo=args.modo,
+        indice_camara=args.camara,
+        ruta_video=args.video,
+        resolucion=args.resolucion,
+        usar_csi=args.csi,
+        fps_deseado=args.fps,
+        detectar_cada_n=args.detectar_cada_n,
+        mostrar_cada_n=args.mostrar_cada_n,
+        resolucion_inferencia=args.resolucion_inferencia,
+        usar_opencl=args.opencl,
+        latencia_objetivo_ms=args.latencia_objetivo_ms,
+        detector_en_hilo=args.detector_en_hilo,
+        frames_calibracion_ear=args.calibracion_ear,
+        dibujar_overlay=not args.headless,
+    )
 
 
 if __name__ == "__main__":
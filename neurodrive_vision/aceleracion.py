@@ -0,0 +1,21 @@
+"""
+Compilación JIT opcional con Numba.
+
+Si Numba está instalado, `njit` es el decorador de Numba y las funciones
+marcadas se compilan a código nativo en la primera llamada.
+Si no lo está, `njit` deja la función tal cual: el paquete sigue funcionando
+igual (interpretado) en equipos donde Numba no se pudo instalar.
+"""
+
+# Importación condicional de Numba
+try:
+    from numba import njit
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+
+    def njit(*args, **kwargs):
+        """Reemplazo sin efecto de numba.njit (acepta tanto @njit como @njit(...))."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda funcion: funcion
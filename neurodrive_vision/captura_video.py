@@ -2,7 +2,9 @@
 """
 import cv2
 import logging
-from typing import Optional, Tuple
+import threading
+import time
+from typing import Dict, Optional, Tuple
 from enum import Enum
 
 # Configurar logging
@@ -35,6 +37,9 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
     # Constantes de configuración
     MAX_REINTENTOS = 3
     #TIMEOUT_LECTURA = 5  # segundos
+    TIMEOUT_FRAME_HILO = 1.0        # segundos de espera máxima por un frame nuevo del hilo de captura
+    ESPERA_REINTENTO_HILO = 0.01    # segundos entre reintentos del hilo tras una lectura fallida
+    MAX_FALLOS_CONSECUTIVOS = 100   # lecturas fallidas seguidas (~1 s) antes de dar la cámara por perdida
     
     def __init__(
         self,
@@ -53,8 +58,22 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
         
         self._captura: Optional[cv2.VideoCapture] = None
         self._tipo_fuente: TipoFuente = self._determinar_tipo_fuente()
+        
+        # Pipelines GStreamer de la cámara CSI, armados una sola vez (reintentos y reiniciar() los reutilizan)
+        self._gst_pipeline, self._gst_pipeline_cpu = self._construir_pipelines_csi()
         self._frames_leidos: int = 0
         self._frames_fallidos: int = 0
+        self._frames_descartados: int = 0
+        
+        # Hilo productor con doble buffer (ver iniciar_hilo)
+        self._hilo_captura: Optional[threading.Thread] = None
+        self._detener_hilo = threading.Event()
+        self._frame_nuevo = threading.Event()
+        self._slot_libre = threading.Event()      # el consumidor tomó el último frame publicado
+        self._lock_slots = threading.Lock()
+        self._slots: list = [None, None]
+        self._idx_escritura: int = 0
+        self._fin_captura: bool = False
         
     def _determinar_tipo_fuente(self) -> TipoFuente:        #Determina el tipo de fuente de video a usar.
         
@@ -65,6 +84,24 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
         else:
             return TipoFuente.CAMARA_USB
     
+    def _construir_pipelines_csi(self) -> Tuple[str, str]:     #Pipeline con conversión de color por hardware y alternativa con videoconvert (CPU).
+
+        ancho, alto = self.resolucion
+        
+        # NV12 nativo del ISP -> BGR con v4l2convert (bloque de conversión de la RPi, no la CPU)
+        pipeline_hw = (
+            f"libcamerasrc ! "
+            f"video/x-raw,format=NV12,width={ancho},height={alto},framerate=30/1 ! "
+            f"v4l2convert ! video/x-raw,format=BGR ! "
+            f"appsink drop=true max-buffers=1 sync=false"
+        )
+        pipeline_cpu = (
+            f"libcamerasrc ! "
+            f"video/x-raw,width={ancho},height={alto},framerate=30/1 ! "
+            f"videoconvert ! appsink drop=true max-buffers=1"
+        )
+        return pipeline_hw, pipeline_cpu
+    
     def iniciar(self) -> None:                              #Abre la cámara o el archivo de video con reintentos automáticos.
 
         for intento in range(self.MAX_REINTENTOS):
@@ -102,12 +139,12 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
         elif self._tipo_fuente == TipoFuente.CAMARA_CSI:
             # Para Raspberry Pi Camera Module (CSI)
             # Usando GStreamer pipeline para mejor rendimiento
-            gst_pipeline = (
-                f"libcamerasrc ! "
-                f"video/x-raw,width={self.resolucion[0]},height={self.resolucion[1]},framerate=30/1 ! "
-                f"videoconvert ! appsink"
-            )
-            self._captura = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
+            self._captura = cv2.VideoCapture(self._gst_pipeline, cv2.CAP_GSTREAMER)
+            
+            # Fallback a conversión por CPU si v4l2convert no está disponible
+            if not self._captura.isOpened():
+                logger.warning("Pipeline CSI con v4l2convert falló, usando videoconvert (CPU)")
+                self._captura = cv2.VideoCapture(self._gst_pipeline_cpu, cv2.CAP_GSTREAMER)
             
         else:  # CAMARA_USB
             # Para Raspberry Pi 5, V4L2 suele funcionar mejor que DSHOW
@@ -123,6 +160,11 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
         if self._captura is None:
             return
         
+        # Pedir MJPEG a las webcams USB antes de la resolución (el formato limita los modos
+        # posibles): la mitad de ancho de banda que YUYV y menos copias en el driver
+        if self._tipo_fuente == TipoFuente.CAMARA_USB:
+            self._captura.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        
         # Configurar resolución
         ancho, alto = self.resolucion
         self._captura.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
@@ -150,16 +192,19 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
     
     def leer_frame(self) -> Tuple[bool, Optional[cv2.Mat]]:     #Lee un frame de la fuente de video con validación. retornamos un bool y el frame
 
-        if self._captura is None:
+        captura = self._captura
+        if captura is None:
             raise ErrorCapturaVideo(
                 "La captura de video no fue inicializada. Llama a 'iniciar()' primero."
             )
         
-        ok, frame = self._captura.read()
+        ok, frame = captura.read()
         
         if not ok:
             self._frames_fallidos += 1
-            logger.debug(f"Fallo al leer frame (total fallidos: {self._frames_fallidos})")
+            # Sin el guard la f-string se formatearía en cada fallo aunque DEBUG esté apagado
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Fallo al leer frame (total fallidos: {self._frames_fallidos})")
             return False, None
         
         # Validar que el frame no está vacío o corrupto
@@ -171,6 +216,134 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
         self._frames_leidos += 1
         return True, frame
     
+    def iniciar_hilo(self) -> None:             #Lanza un hilo que lee frames continuamente, desacoplando la cámara del procesamiento.
+
+        if self._captura is None:
+            raise ErrorCapturaVideo(
+                "La captura de video no fue inicializada. Llama a 'iniciar()' primero."
+            )
+        if self._hilo_captura is not None and self._hilo_captura.is_alive():
+            return
+        
+        self._detener_hilo.clear()
+        self._frame_nuevo.clear()
+        self._slot_libre.set()
+        self._slots = [None, None]
+        self._idx_escritura = 0
+        self._fin_captura = False
+        
+        self._hilo_captura = threading.Thread(
+            target=self._loop_captura, name="CapturadorVideo", daemon=True
+        )
+        self._hilo_captura.start()
+        logger.info("Hilo de captura iniciado")
+    
+    def _loop_captura(self) -> None:            #Productor: escribe en el slot libre y lo publica alternando el índice.
+
+        # Un archivo se lee a su FPS nominal; una cámara ya entrega a su propio ritmo
+        es_archivo = self._tipo_fuente == TipoFuente.ARCHIVO
+        periodo = 1.0 / self.obtener_fps() if es_archivo else 0.0
+        
+        # Referencias locales: este loop corre una vez por frame durante toda la sesión
+        leer = self.leer_frame
+        detenido = self._detener_hilo.is_set
+        slots = self._slots
+        lock = self._lock_slots
+        frame_nuevo = self._frame_nuevo
+        slot_libre = self._slot_libre
+        espera_slot = self.TIMEOUT_FRAME_HILO
+        reloj = time.perf_counter
+        espera_reintento = self.ESPERA_REINTENTO_HILO
+        max_fallos = self.MAX_FALLOS_CONSECUTIVOS
+        fallos_seguidos = 0
+        
+        while not detenido():
+            inicio = reloj()
+            ok, frame = leer()
+            
+            if not ok:
+                if es_archivo or detenido():
+                    break
+                # Sin la espera, una cámara desconectada deja este hilo girando al 100% de CPU
+                fallos_seguidos += 1
+                if fallos_seguidos >= max_fallos:
+                    logger.error(f"{fallos_seguidos} lecturas fallidas seguidas, se detiene la captura")
+                    break
+                time.sleep(espera_reintento)
+                continue
+            fallos_seguidos = 0
+            
+            slots[self._idx_escritura] = frame
+            if es_archivo:
+                # Un archivo no pierde frames: se espera a que el consumidor tome el anterior
+                while not slot_libre.wait(espera_slot) and not detenido():
+                    pass
+                if detenido():
+                    break
+            with lock:
+                slot_libre.clear()
+                if frame_nuevo.is_set():
+                    # El consumidor no alcanzó a leer el frame anterior
+                    self._frames_descartados += 1
+                self._idx_escritura = 1 - self._idx_escritura
+                frame_nuevo.set()
+            
+            if periodo > 0:
+                restante = periodo - (reloj() - inicio)
+                if restante > 0:
+                    time.sleep(restante)
+        
+        # El último frame del archivo también tiene que llegar al consumidor antes del fin
+        if es_archivo:
+            while not slot_libre.wait(espera_slot) and not detenido():
+                pass
+        
+        with self._lock_slots:
+            self._fin_captura = True
+            self._frame_nuevo.set()
+        logger.info("Hilo de captura finalizado")
+    
+    def leer_frame_ultimo(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[cv2.Mat]]:  #Consumidor: retorna el frame más nuevo publicado por el hilo.
+
+        if self._hilo_captura is None:
+            raise ErrorCapturaVideo(
+                "El hilo de captura no fue iniciado. Llama a 'iniciar_hilo()' primero."
+            )
+        
+        espera = self.TIMEOUT_FRAME_HILO if timeout is None else timeout
+        if not self._frame_nuevo.wait(espera):
+            logger.warning(f"No llegó un frame nuevo en {espera:.1f} s")
+            return False, None
+        
+        with self._lock_slots:
+            frame = self._slots[1 - self._idx_escritura]
+            fin = self._fin_captura
+            self._frame_nuevo.clear()
+            self._slot_libre.set()
+        
+        if frame is None or fin:
+            return False, None
+        return True, frame
+    
+    def detener_hilo(self) -> None:             #Detiene el hilo de captura y espera a que termine.
+
+        hilo = getattr(self, "_hilo_captura", None)
+        if hilo is None:
+            return
+        self._detener_hilo.set()
+        self._slot_libre.set()      # por si el productor espera al consumidor
+        if hilo is not threading.current_thread():
+            hilo.join(timeout=self.TIMEOUT_FRAME_HILO)
+        self._hilo_captura = None
+    
+    def obtener_estadisticas(self) -> Dict[str, int]:      #Devuelve los contadores de frames leídos, fallidos y descartados.
+
+        return {
+            "frames_leidos": self._frames_leidos,
+            "frames_fallidos": self._frames_fallidos,
+            "frames_descartados": self._frames_descartados,
+        }
+    
     def obtener_fps(self) -> float:             #Devuelve los FPS reportados por la fuente de video.
 
         if self._captura is None:
@@ -203,6 +376,9 @@ class CapturadorVideo:                      #Clase responsable de manejar la fue
     
     def liberar(self) -> None:                  #Libera la cámara / archivo de video y recursos asociados.
 
+        # El hilo no puede seguir leyendo de una captura liberada
+        self.detener_hilo()
+        
         if self._captura is not None:
             self._captura.release()
             self._captura = None
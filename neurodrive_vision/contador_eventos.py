@@ -14,42 +14,171 @@ Este módulo:
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional, List
+from enum import IntEnum
+from typing import Deque, Optional, NamedTuple, Tuple
 import logging
+import math
 
+import numpy as np
+
+from .aceleracion import NUMBA_DISPONIBLE, njit
 from .medidas_rostro import MedidasRostro
 
 logger = logging.getLogger(__name__)
 
 
+# ==============================
+#   Núcleo numérico de ojos (compilado con Numba si está disponible)
+# ==============================
+
+class EstOjos(IntEnum):
+    """Estado de los ojos (EstadoOjos.estado). str() da el nombre para logs / visualización."""
+    DESCONOCIDO = 0
+    ABIERTO = 1
+    CERRADO = 2     # = ABIERTO + 1, lo usa _paso_ojos
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+
+# Alias cortos de los miembros
+DESCONOCIDO = EstOjos.DESCONOCIDO
+ABIERTO = EstOjos.ABIERTO
+CERRADO = EstOjos.CERRADO
+
+# _paso_ojos recibe y devuelve el estado como int simple: pasarle un miembro de
+# IntEnum obliga a Numba a convertirlo en cada llamada (~20 veces más lento)
+_COD_DESCONOCIDO = int(DESCONOCIDO)
+_ESTADOS_OJOS = tuple(EstOjos)  # código int -> miembro de EstOjos
+
+
+@njit(cache=True)
+def _paso_ojos(
+    ear: float,
+    ear_filtrado: float,
+    estado: int,
+    duracion: float,
+    dt: float,
+    alpha: float,
+    uno_menos_alpha: float,
+    umbral_cerrar: float,
+    umbral_abrir: float,
+):
+    """
+    Un paso de la máquina de estados de ojos: suavizado del EAR + histéresis.
+
+    ear_filtrado es NaN mientras no haya un EAR previo (primer frame válido).
+    uno_menos_alpha = 1 - alpha, precalculado por el llamador.
+
+    Devuelve (ear_filtrado, estado, duracion, duracion_anterior). Si no hubo
+    cambio de estado, duracion_anterior es -1.0; si lo hubo, es la duración
+    del estado que terminó (para decidir parpadeo / microsueño).
+    """
+    # 1) Suavizado exponencial del EAR
+    if np.isnan(ear_filtrado):
+        ear_filtrado = ear
+    else:
+        ear_filtrado = alpha * ear_filtrado + uno_menos_alpha * ear
+
+    # 2) Histéresis sin ramas: cerrado sigue cerrado hasta superar umbral_abrir;
+    #    abierto / desconocido se cierra solo por debajo de umbral_cerrar
+    estaba_cerrado = estado == CERRADO
+    cerrado = (estaba_cerrado & (ear_filtrado <= umbral_abrir)) | (
+        (not estaba_cerrado) & (ear_filtrado < umbral_cerrar)
+    )
+    nuevo_estado = ABIERTO + cerrado
+
+    # 3) Actualizar duración de estado
+    if nuevo_estado == estado:
+        return ear_filtrado, estado, duracion + dt, -1.0
+    return ear_filtrado, nuevo_estado, dt, duracion
+
+
+def _alpha_para_corte(cutoff_hz: float, fps: float) -> float:
+    """
+    Coeficiente de la EMA de _paso_ojos para una frecuencia de corte dada.
+
+    La EMA m_t = alpha * m_{t-1} + (1 - alpha) * x_t es un pasabajos de primer
+    orden. Con alpha = exp(-2*pi*fc/fps) su frecuencia de corte queda en fc Hz
+    sea cual sea el frame rate: a menos FPS, alpha baja y cada muestra pesa más.
+    """
+    return math.exp(-2.0 * math.pi * cutoff_hz / fps)
+
+
+# Compilar (o cargar del cache en disco) al importar, con los mismos tipos que las
+# llamadas reales: si no, el primer frame con rostro se frena ~0.3 s
+if NUMBA_DISPONIBLE:
+    _paso_ojos(0.3, np.nan, _COD_DESCONOCIDO, 0.0, 0.0, 0.5, 0.5, 0.18, 0.22)
+
+
 # ==============================
 #   Estructuras de datos
 # ==============================
 
-@dataclass
+@dataclass(slots=True)
 class EstadoOjos:
-    estado: str = "desconocido"  # "abierto" | "cerrado" | "desconocido"
+    estado: EstOjos = EstOjos.DESCONOCIDO
     duracion_estado: float = 0.0
     ear_actual: Optional[float] = None
 
 
-@dataclass
+# Posición de cada evento en EventosSomnolencia.banderas
+BIT_PARPADEO = 0
+BIT_MICROSUENO = 1
+BIT_BOSTEZO = 2
+BIT_CABECEO = 3
+
+
+@dataclass(slots=True)
 class EventosSomnolencia:
     parpadeo: bool = False
     microsueno: bool = False
     bostezo: bool = False
     cabeceo: bool = False
 
+    @property
+    def banderas(self) -> int:
+        """Los cuatro eventos empaquetados en un entero (ver BIT_*); 0 = ningún evento."""
+        return (
+            (self.parpadeo << BIT_PARPADEO)
+            | (self.microsueno << BIT_MICROSUENO)
+            | (self.bostezo << BIT_BOSTEZO)
+            | (self.cabeceo << BIT_CABECEO)
+        )
+
+
+# Motivo con datos numéricos: se formatea recién cuando alguien lee AtencionConductor.motivo
+MOTIVO_INTER_LARGO = "inter-parpadeo promedio largo ({:.1f}s) posible desatencion / mente en la nube"
 
-@dataclass
+
+@dataclass(slots=True)
 class AtencionConductor:
     nivel: float = 1.0           # 0.0–1.0
     categoria: str = "alta"      # "alta" | "media" | "baja"
-    motivo: str = "normal"
+    plantilla_motivo: str = "normal"        # texto del motivo, con {} si lleva args_motivo
+    args_motivo: Tuple[float, ...] = ()
+    _motivo: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def motivo(self) -> str:
+        """Motivo legible. Se arma en la primera lectura y queda guardado."""
+        if self._motivo is None:
+            plantilla = self.plantilla_motivo
+            self._motivo = plantilla.format(*self.args_motivo) if self.args_motivo else plantilla
+        return self._motivo
+
 
+class ResumenEventos(NamedTuple):
+    """Conteos acumulados de obtener_estadisticas(). ._asdict() si hace falta como dict."""
+    parpadeos_total: int = 0
+    microsuenos_total: int = 0
+    bostezos_total: int = 0
+    cabeceos_total: int = 0
 
-@dataclass
+
+@dataclass(slots=True)
 class SalidaEventos:
     timestamp: float
     estado_ojos: EstadoOjos
@@ -74,6 +203,66 @@ class ContadorEventosSomnolencia:
     tomar decisiones robustas (alertas, vibración, etc.).
     """
 
+    # Todos los atributos que crea __init__ (acceso por slot, sin __dict__ por instancia)
+    __slots__ = (
+        # Umbrales y constantes
+        "umbral_ear_cerrado",
+        "dur_min_parpadeo",
+        "dur_max_parpadeo",
+        "dur_min_microsueno",
+        "umbral_mar_bostezo",
+        "dur_min_bostezo",
+        "ventana_interparpadeos_seg",
+        "interparpadeo_atencion_baja",
+        "cutoff_hz_ear",
+        # Estado interno / ojos
+        "_ultimo_timestamp",
+        "_estado_ojos",
+        "_codigo_estado_ojos",
+        "_ear_filtrado",
+        "_alpha_ear",
+        "_uno_menos_alpha_ear",
+        "_fps_alpha_ear",
+        "_dt_promedio",
+        "_umbral_ear_cerrar",
+        "_umbral_ear_abrir",
+        # Parpadeos y microsueños
+        "_tiempo_refractario_parpadeo",
+        "_conteo_parpadeos_total",
+        "_conteo_microsuenos_total",
+        "_ultimo_parpadeo_timestamp",
+        "_historial_interparpadeos",
+        "_suma_interparpadeos",
+        # Calibración de EAR
+        "_frames_calibracion_ear",
+        "_muestras_calibracion",
+        "_n_muestras_calibracion",
+        "_k_sigma_calibracion",
+        "_semi_histeresis",
+        # Boca
+        "_boca_abierta",
+        "_tiempo_boca_abierta",
+        "_conteo_bostezos_total",
+        # Cabeza
+        "_cabeceo_activo",
+        "_tiempo_cabeza_abajo",
+        "_dur_min_cabeceo",
+        "_conteo_cabeceos_total",
+        "_baseline_altura_nariz",
+        "_baseline_altura_menton",
+        "_alpha_baseline_cabeza",
+        "_umbral_delta_cabeza",
+        # Estímulos de pulsera
+        "_ultimo_estimulo",
+        "_ultimo_tiempo_respuesta",
+        "_latencias_respuesta",
+        "_suma_latencias",
+        # Resultados memorizados
+        "_estadisticas",
+        "_atencion_cache",
+        "_atencion_sucia",
+    )
+
     def __init__(
         self,
         umbral_ear_cerrado: float = 0.20,
@@ -84,7 +273,9 @@ class ContadorEventosSomnolencia:
         dur_min_bostezo: float = 1.0,
         ventana_interparpadeos_seg: float = 60.0,
         interparpadeo_atencion_baja: float = 8.0,
-        
+        frames_calibracion_ear: int = 0,
+        cutoff_hz_ear: float = 3.0,
+        fps_estimada: float = 30.0,
     ) -> None:
         """
         Parámetros ajustables (podemos calibrarlos más adelante con literatura o pruebas):
@@ -104,13 +295,17 @@ class ContadorEventosSomnolencia:
         interparpadeo_atencion_baja :
             Umbral (segundos). Inter-parpadeos mucho mayores a esto de forma sostenida
             pueden indicar desatención / mirada perdida.
+        frames_calibracion_ear :
+            Si es > 0, los primeros N frames con EAR válido se usan para estimar el
+            EAR con ojos abiertos de este conductor (mediana y desvío) y fijar a partir
+            de él los umbrales de histéresis. 0 = umbrales fijos.
+        cutoff_hz_ear :
+            Frecuencia de corte (Hz) del suavizado del EAR. Un parpadeo dura
+            ~0.1–0.4 s, así que unos pocos Hz filtran ruido sin borrarlos.
+        fps_estimada :
+            Frecuencia inicial con la que se llama a actualizar(). Después se
+            corrige sola con la frecuencia medida de las llamadas (ver actualizar()).
         """
-        # Para cabeza (cabeceo simple)
-        self._cabeceo_activo: bool = False
-        self._tiempo_cabeza_abajo: float = 0.0
-        self._dur_min_cabeceo: float = 1.0  # se podría parametrizar
-        self._conteo_cabeceos_total: int = 0  # <-- AGREGAR ESTA LÍNEA
-
         # Umbrales y constantes
         self.umbral_ear_cerrado = umbral_ear_cerrado
         self.dur_min_parpadeo = dur_min_parpadeo
@@ -120,28 +315,41 @@ class ContadorEventosSomnolencia:
         self.dur_min_bostezo = dur_min_bostezo
         self.ventana_interparpadeos_seg = ventana_interparpadeos_seg
         self.interparpadeo_atencion_baja = interparpadeo_atencion_baja
+        self.cutoff_hz_ear = cutoff_hz_ear
 
         # Estado interno
         self._ultimo_timestamp: Optional[float] = None
         self._estado_ojos = EstadoOjos()
-
-        # Para detectar parpadeos y microsueños
-        self._conteo_parpadeos_total: int = 0
-        self._conteo_microsuenos_total: int = 0
-        self._ultimo_parpadeo_timestamp: Optional[float] = None
-        self._historial_interparpadeos: List[float] = []  # últimos N segundos
+        self._codigo_estado_ojos: int = _COD_DESCONOCIDO  # _estado_ojos.estado como int simple (para _paso_ojos)
 
         # Suavizado de EAR
         self._ear_filtrado: Optional[float] = None
-        self._alpha_ear: float = 0.5  # 0.0 = sin suavizar, 0.99 = muy suave
+        # alpha: 0.0 = sin suavizar, 0.99 = muy suave. Sale de cutoff_hz_ear y los FPS
+        self._alpha_ear: float = _alpha_para_corte(cutoff_hz_ear, fps_estimada)
+        self._uno_menos_alpha_ear: float = 1.0 - self._alpha_ear  # cambiar ambos con _fijar_alpha_ear()
+        self._fps_alpha_ear: float = fps_estimada   # FPS con los que se calculó _alpha_ear
+        self._dt_promedio: float = 1.0 / fps_estimada  # EMA del intervalo entre llamadas a actualizar()
 
         # Histéresis para ojo cerrado/abierto
         self._umbral_ear_cerrar: float = 0.18
         self._umbral_ear_abrir: float = 0.22
 
-        # Período refractario entre parpadeos (seg)
-        self._tiempo_refractario_parpadeo: float = 0.25
-
+        # Para detectar parpadeos y microsueños
+        self._tiempo_refractario_parpadeo: float = 0.25  # período refractario entre parpadeos (seg)
+        self._conteo_parpadeos_total: int = 0
+        self._conteo_microsuenos_total: int = 0
+        self._ultimo_parpadeo_timestamp: Optional[float] = None
+        # Últimos 100 inter-parpadeos en milisegundos enteros (el deque descarta el más
+        # viejo solo) y su suma acumulada, también en ms: entera, así que nunca deriva
+        self._historial_interparpadeos: Deque[int] = deque(maxlen=100)
+        self._suma_interparpadeos: int = 0
+
+        # Calibración opcional de la histéresis con el EAR propio del conductor
+        self._frames_calibracion_ear: int = max(0, frames_calibracion_ear)
+        self._muestras_calibracion = np.empty(self._frames_calibracion_ear, dtype=np.float32)
+        self._n_muestras_calibracion: int = 0
+        self._k_sigma_calibracion: float = 2.0      # umbral = mediana - k * desvío
+        self._semi_histeresis: float = 0.02         # mitad de la banda entre cerrar y abrir
 
         # Para boca (bostezos)
         self._boca_abierta: bool = False
@@ -152,16 +360,28 @@ class ContadorEventosSomnolencia:
         self._cabeceo_activo: bool = False
         self._tiempo_cabeza_abajo: float = 0.0
         self._dur_min_cabeceo: float = 1.0  # se podría parametrizar
-        
+        self._conteo_cabeceos_total: int = 0
+
         # Baseline para cabeza (se irá actualizando cuando no hay eventos raros)
         self._baseline_altura_nariz: Optional[float] = None
         self._baseline_altura_menton: Optional[float] = None
-
+        self._alpha_baseline_cabeza: float = 0.005  # suavizado del baseline (adaptación lenta a la postura)
+        self._umbral_delta_cabeza: float = 0.10     # 10% de la altura de la imagen, se puede ajustar
 
         # Para estímulos de pulsera (futuro)
         self._ultimo_estimulo: Optional[float] = None
         self._ultimo_tiempo_respuesta: Optional[float] = None
-        self._latencias_respuesta: List[float] = []
+        # Últimas 50 latencias de respuesta y su suma (para un promedio en O(1))
+        self._latencias_respuesta: Deque[float] = deque(maxlen=50)
+        self._suma_latencias: float = 0.0
+
+        # Último resumen de obtener_estadisticas(): se rearma solo si cambió algún conteo
+        self._estadisticas = ResumenEventos()
+
+        # Última estimación de atención. Solo cambia con un microsueño o un inter-parpadeo
+        # nuevo, así que se recalcula únicamente cuando alguno de esos marca _atencion_sucia
+        self._atencion_cache: Optional[AtencionConductor] = None
+        self._atencion_sucia: bool = True
 
     # ---------- API pública ----------
 
@@ -172,8 +392,8 @@ class ContadorEventosSomnolencia:
         Parámetros
         ----------
         timestamp : float
-            Tiempo absoluto en segundos (por ejemplo, time.time()) o el
-            timestamp proveniente de DatosRostro.
+            Tiempo en segundos de un reloj monotónico (time.monotonic(), el
+            mismo que usa DatosRostro.timestamp). Solo se usan diferencias.
         medidas : MedidasRostro
             Medidas geométricas del rostro para el frame actual.
 
@@ -183,12 +403,20 @@ class ContadorEventosSomnolencia:
         """
         eventos = EventosSomnolencia()
 
-        if self._ultimo_timestamp is None:
+        ultimo_timestamp = self._ultimo_timestamp
+        if ultimo_timestamp is None:
             dt = 0.0
+            self._ultimo_timestamp = timestamp
         else:
-            dt = max(0.0, timestamp - self._ultimo_timestamp)
-
-        self._ultimo_timestamp = timestamp
+            # Comparación directa en lugar de max(0.0, ...): evita una llamada por frame
+            dt = timestamp - ultimo_timestamp
+            if dt < 0.0:
+                # Marca atrasada: no se guarda, si no el próximo dt contaría dos veces el intervalo
+                dt = 0.0
+            else:
+                if dt > 0.0:
+                    self._medir_fps(dt)
+                self._ultimo_timestamp = timestamp
 
         # 1) Actualizar estado de ojos y detectar parpadeos / microsueños
         self._actualizar_ojos_y_eventos(dt, medidas, eventos)
@@ -199,8 +427,12 @@ class ContadorEventosSomnolencia:
         # 3) Actualizar estado de cabeza (cabeceos simples)
         self._actualizar_cabeza(dt, medidas, eventos)
 
-        # 4) Estimar atención del conductor
-        atencion = self._estimar_atencion(timestamp)
+        # 4) Estimar atención del conductor (reutiliza la anterior si nada la afectó;
+        #    todas las salidas comparten ese mismo objeto, tratarlo como solo lectura)
+        if self._atencion_sucia:
+            self._atencion_cache = self._estimar_atencion(timestamp)
+            self._atencion_sucia = False
+        atencion = self._atencion_cache
 
         salida = SalidaEventos(
             timestamp=timestamp,
@@ -210,6 +442,20 @@ class ContadorEventosSomnolencia:
         )
         return salida
 
+    def actualizar_fps(self, fps: float) -> None:
+        """
+        Informa la frecuencia real (Hz) con la que se llama a actualizar().
+
+        Recalcula el suavizado del EAR para que su frecuencia de corte siga
+        siendo cutoff_hz_ear (p.ej. si la Raspberry Pi baja de 30 a 15 FPS).
+        """
+        if fps <= 0:
+            logger.warning(f"FPS inválidos ({fps}); se mantiene el suavizado actual del EAR.")
+            return
+        self._fps_alpha_ear = fps
+        self._dt_promedio = 1.0 / fps
+        self._fijar_alpha_ear(_alpha_para_corte(self.cutoff_hz_ear, fps))
+
     def registrar_estimulo(self, timestamp: float) -> None:
         """
         Registra que se envió un estímulo a la pulsera (ej. vibración + secuencia).
@@ -230,11 +476,13 @@ class ContadorEventosSomnolencia:
 
         latencia = max(0.0, timestamp - self._ultimo_estimulo)
         self._ultimo_tiempo_respuesta = timestamp
-        self._latencias_respuesta.append(latencia)
 
-        # Podríamos limitar la longitud de la lista para no crecer sin límite
-        if len(self._latencias_respuesta) > 50:
-            self._latencias_respuesta.pop(0)
+        # El deque está limitado a 50: al llenarse, append() descarta la más vieja
+        latencias = self._latencias_respuesta
+        if len(latencias) == latencias.maxlen:
+            self._suma_latencias -= latencias[0]
+        latencias.append(latencia)
+        self._suma_latencias += latencia
 
         # Consumimos el estímulo
         self._ultimo_estimulo = None
@@ -248,81 +496,134 @@ class ContadorEventosSomnolencia:
         eventos: EventosSomnolencia
     ) -> None:
         # Determinar EAR promedio
-        ear_crudo = medidas.medidas_ojos.ear_promedio if medidas.medidas_ojos.valido else None
+        medidas_ojos = medidas.medidas_ojos
+        ear_crudo = medidas_ojos.ear_promedio if medidas_ojos.valido else None
 
         if ear_crudo is None:
-            # No actualizamos estado si no hay medida confiable
-            self._estado_ojos.estado = "desconocido"
-            self._estado_ojos.ear_actual = None
+            # No actualizamos estado si no hay medida confiable. Solo se escribe al
+            # perder la medida: mientras siga perdida el estado ya es DESCONOCIDO
+            # (y ear_actual None, porque todo frame válido deja ABIERTO o CERRADO)
+            if self._codigo_estado_ojos != _COD_DESCONOCIDO:
+                self._codigo_estado_ojos = _COD_DESCONOCIDO
+                self._estado_ojos.estado = DESCONOCIDO
+                self._estado_ojos.ear_actual = None
             return
 
-        # 1) Suavizado exponencial del EAR
-        if self._ear_filtrado is None:
-            self._ear_filtrado = ear_crudo
-        else:
-            self._ear_filtrado = (
-                self._alpha_ear * self._ear_filtrado +
-                (1.0 - self._alpha_ear) * ear_crudo
-            )
-
-        ear = self._ear_filtrado
+        if self._n_muestras_calibracion < self._frames_calibracion_ear:
+            self._registrar_muestra_calibracion(ear_crudo)
+
+        # 1) + 2) Suavizado e histéresis en el núcleo numérico
+        estado_anterior = self._codigo_estado_ojos
+        ear, estado, duracion, dur_anterior = _paso_ojos(
+            ear_crudo,
+            np.nan if self._ear_filtrado is None else self._ear_filtrado,
+            estado_anterior,
+            self._estado_ojos.duracion_estado,
+            dt,
+            self._alpha_ear,
+            self._uno_menos_alpha_ear,
+            self._umbral_ear_cerrar,
+            self._umbral_ear_abrir,
+        )
+        self._ear_filtrado = ear
         self._estado_ojos.ear_actual = ear
+        self._estado_ojos.duracion_estado = duracion
 
-        # 2) Histéresis para determinar estado nuevo
-        estado_actual = self._estado_ojos.estado
-
-        if estado_actual in ("desconocido", "abierto"):
-            # Solo cerramos si bajamos por debajo de umbral de cierre
-            if ear < self._umbral_ear_cerrar:
-                nuevo_estado = "cerrado"
-            else:
-                nuevo_estado = "abierto"
-        else:  # estado_actual == "cerrado"
-            # Solo abrimos si subimos por encima de umbral de apertura
-            if ear > self._umbral_ear_abrir:
-                nuevo_estado = "abierto"
-            else:
-                nuevo_estado = "cerrado"
-
-        # 3) Actualizar duración de estado y detectar eventos al cambiar
-        if estado_actual == nuevo_estado:
-            self._estado_ojos.duracion_estado += dt
+        # 3) Sin cambio de estado no hay eventos que evaluar
+        if estado == estado_anterior:
             return
 
-        # Hay cambio de estado -> evaluamos el estado anterior
-        dur_anterior = self._estado_ojos.duracion_estado
-        estado_anterior = estado_actual
+        self._codigo_estado_ojos = estado
+        self._estado_ojos.estado = _ESTADOS_OJOS[estado]
 
-        if estado_anterior == "cerrado":
+        # Hay cambio de estado -> evaluamos el estado anterior (dur_anterior)
+        if estado_anterior == CERRADO:
             # Venimos de un período de ojos cerrados -> puede ser parpadeo o microsueño
             if self.dur_min_parpadeo <= dur_anterior <= self.dur_max_parpadeo:
+                ts = self._ultimo_timestamp
+                ultimo_parpadeo = self._ultimo_parpadeo_timestamp
+                # Tiempo desde el parpadeo anterior (None si es el primero)
+                inter = None if ultimo_parpadeo is None else ts - ultimo_parpadeo
                 # Verificar período refractario
-                if (
-                    self._ultimo_parpadeo_timestamp is None or
-                    (self._ultimo_timestamp - self._ultimo_parpadeo_timestamp) >= self._tiempo_refractario_parpadeo
-                ):
+                if inter is None or inter >= self._tiempo_refractario_parpadeo:
                     eventos.parpadeo = True
                     self._conteo_parpadeos_total += 1
-                    if self._ultimo_parpadeo_timestamp is not None:
-                        inter = max(0.0, self._ultimo_timestamp - self._ultimo_parpadeo_timestamp)
-                        self._agregar_interparpadeo(inter)
-                    self._ultimo_parpadeo_timestamp = self._ultimo_timestamp
+                    if inter is not None:
+                        self._agregar_interparpadeo(max(0.0, inter))
+                    self._ultimo_parpadeo_timestamp = ts
 
             elif dur_anterior >= self.dur_min_microsueno:
                 eventos.microsueno = True
                 self._conteo_microsuenos_total += 1
+                self._atencion_sucia = True
 
-        # Reiniciar duración para el nuevo estado
-        self._estado_ojos.estado = nuevo_estado
-        self._estado_ojos.duracion_estado = dt
 
+    def _medir_fps(self, dt: float) -> None:
+        """
+        Sigue la frecuencia real de actualizar() con una EMA del intervalo entre
+        llamadas, y recalcula el suavizado del EAR (actualizar_fps) cuando se aleja
+        más de un 5% de la usada hasta ahora. El loop principal solo toma el frame
+        más nuevo, así que esta frecuencia es la del loop, no la nominal de la cámara.
+        """
+        # Un hueco largo (p.ej. el rostro se perdió varios segundos) no es la frecuencia
+        # del loop: se recorta a 2x el promedio. Así un intervalo suelto mueve la EMA
+        # menos de un 5%, y una caída real de FPS igual se sigue en unas decenas de frames.
+        dt_promedio = self._dt_promedio
+        if dt > 2.0 * dt_promedio:
+            dt = 2.0 * dt_promedio
+        dt_promedio += 0.05 * (dt - dt_promedio)
+        self._dt_promedio = dt_promedio
+
+        fps_medida = 1.0 / dt_promedio
+        if abs(fps_medida - self._fps_alpha_ear) > 0.05 * self._fps_alpha_ear:
+            self.actualizar_fps(fps_medida)
+
+    def _fijar_alpha_ear(self, alpha: float) -> None:
+        """Cambia el suavizado del EAR manteniendo al día 1 - alpha (lo usa cada frame _paso_ojos)."""
+        self._alpha_ear = alpha
+        self._uno_menos_alpha_ear = 1.0 - alpha
+
+    def _registrar_muestra_calibracion(self, ear: float) -> None:
+        """
+        Guarda el EAR crudo de los primeros frames y, al completar la ventana,
+        recalcula una única vez los umbrales de histéresis.
+        """
+        self._muestras_calibracion[self._n_muestras_calibracion] = ear
+        self._n_muestras_calibracion += 1
+        if self._n_muestras_calibracion < self._frames_calibracion_ear:
+            return
+
+        # Mediana en lugar de media: los parpadeos dentro de la ventana casi no la mueven
+        mediana = float(np.median(self._muestras_calibracion))
+        desvio = float(np.std(self._muestras_calibracion))
+
+        # Sin parpadeos en la ventana el desvío es casi cero y el umbral quedaría
+        # pegado al EAR abierto; se limita a un 80% de la mediana
+        umbral = min(mediana - self._k_sigma_calibracion * desvio, 0.8 * mediana)
+        self._umbral_ear_cerrar = umbral - self._semi_histeresis
+        self._umbral_ear_abrir = umbral + self._semi_histeresis
+
+        logger.info(
+            f"Umbrales de EAR calibrados con {self._n_muestras_calibracion} frames "
+            f"(mediana={mediana:.3f}, desvio={desvio:.3f}): "
+            f"cerrar<{self._umbral_ear_cerrar:.3f}, abrir>{self._umbral_ear_abrir:.3f}"
+        )
 
     def _agregar_interparpadeo(self, valor: float) -> None:
-        """Agrega un nuevo inter-parpadeo al historial y poda según ventana de tiempo aproximada."""
-        self._historial_interparpadeos.append(valor)
-        # Podemos limitar la cantidad de muestras, por simplicidad
-        if len(self._historial_interparpadeos) > 100:
-            self._historial_interparpadeos.pop(0)
+        """
+        Agrega un nuevo inter-parpadeo (segundos) al historial (máx. 100) y mantiene la suma al día.
+
+        Se guarda cuantizado a milisegundos enteros: la suma corrida es exacta
+        (sin error de redondeo acumulado) y 1 ms sobra para promedios de segundos.
+        """
+        valor_ms = round(valor * 1000.0)
+        historial = self._historial_interparpadeos
+        if len(historial) == historial.maxlen:
+            # append() va a descartar el más viejo
+            self._suma_interparpadeos -= historial[0]
+        historial.append(valor_ms)
+        self._suma_interparpadeos += valor_ms
+        self._atencion_sucia = True
 
     # ---------- Lógica interna: boca ----------
 
@@ -332,22 +633,26 @@ class ContadorEventosSomnolencia:
         medidas: MedidasRostro,
         eventos: EventosSomnolencia
     ) -> None:
-        if not medidas.medidas_boca.valido or medidas.medidas_boca.mar is None:
+        medidas_boca = medidas.medidas_boca
+        mar = medidas_boca.mar
+        if not medidas_boca.valido or mar is None:
             # No tocamos el estado de boca si no hay datos
             return
 
-        mar = medidas.medidas_boca.mar
         boca_abierta_ahora = mar >= self.umbral_mar_bostezo
+        abierta_prev = self._boca_abierta
 
+        # El estado solo se escribe en los flancos: con la boca cerrada y quieta
+        # (el caso normal) no hay ninguna escritura. Cerrada => tiempo en 0.0
         if boca_abierta_ahora:
             self._tiempo_boca_abierta += dt
-            self._boca_abierta = True
-        else:
-            # Si se estaba abierta y se cerró, evaluamos duración
-            if self._boca_abierta:
-                if self._tiempo_boca_abierta >= self.dur_min_bostezo:
-                    eventos.bostezo = True
-                    self._conteo_bostezos_total += 1
+            if not abierta_prev:
+                self._boca_abierta = True
+        elif abierta_prev:
+            # Se estaba abierta y se cerró: evaluamos duración
+            if self._tiempo_boca_abierta >= self.dur_min_bostezo:
+                eventos.bostezo = True
+                self._conteo_bostezos_total += 1
             self._boca_abierta = False
             self._tiempo_boca_abierta = 0.0
 
@@ -359,11 +664,12 @@ class ContadorEventosSomnolencia:
         medidas: MedidasRostro,
         eventos: EventosSomnolencia
     ) -> None:
-        if not medidas.medidas_cabeza.valido:
+        medidas_cabeza = medidas.medidas_cabeza
+        if not medidas_cabeza.valido:
             return
 
-        altura_nariz = medidas.medidas_cabeza.altura_relativa_nariz or 0.0
-        altura_menton = medidas.medidas_cabeza.altura_relativa_menton or 0.0
+        altura_nariz = medidas_cabeza.altura_relativa_nariz or 0.0
+        altura_menton = medidas_cabeza.altura_relativa_menton or 0.0
 
         # Inicializar baseline si aún no lo tenemos y parece postura "normal"
         if self._baseline_altura_nariz is None or self._baseline_altura_menton is None:
@@ -372,24 +678,24 @@ class ContadorEventosSomnolencia:
             self._baseline_altura_menton = altura_menton
             return
 
+        base_nariz = self._baseline_altura_nariz
+        base_menton = self._baseline_altura_menton
+
         # Delta respecto al baseline (positivo = cabeza más abajo)
-        delta_nariz = altura_nariz - self._baseline_altura_nariz
-        delta_menton = altura_menton - self._baseline_altura_menton
+        delta_nariz = altura_nariz - base_nariz
+        delta_menton = altura_menton - base_menton
 
         # Actualizar baseline suavemente cuando no parece haber cabeceo
-        # (esto ayuda a adaptarse a cambios lentos de postura)
+        # (esto ayuda a adaptarse a cambios lentos de postura).
+        # EMA en forma base += alpha * delta, reutilizando el delta ya calculado
         if not self._cabeceo_activo:
-            alpha_base = 0.005
-            self._baseline_altura_nariz = (
-                (1 - alpha_base) * self._baseline_altura_nariz + alpha_base * altura_nariz
-            )
-            self._baseline_altura_menton = (
-                (1 - alpha_base) * self._baseline_altura_menton + alpha_base * altura_menton
-            )
+            alpha_base = self._alpha_baseline_cabeza
+            self._baseline_altura_nariz = base_nariz + alpha_base * delta_nariz
+            self._baseline_altura_menton = base_menton + alpha_base * delta_menton
 
         # Heurística: cabeza significativa abajo si ambos se movieron bastante hacia abajo
-        umbral_delta = 0.10  # 10% de la altura de la imagen, se puede ajustar
-        cabeza_abajo_ahora = (delta_nariz > umbral_delta) and (delta_menton > umbral_delta)
+        umbral_delta = self._umbral_delta_cabeza
+        cabeza_abajo_ahora = delta_nariz > umbral_delta and delta_menton > umbral_delta
 
         if cabeza_abajo_ahora:
             self._tiempo_cabeza_abajo += dt
@@ -412,10 +718,14 @@ class ContadorEventosSomnolencia:
         - Si hay microsueños recientes (últimos ~60 s) -> atención muy baja.
         - Si inter-parpadeos promedio son muy largos -> posible desatención.
         - Si hay respuestas a estímulos (futuro), se puede ajustar el nivel.
+
+        Solo se llama cuando _atencion_sucia está en True: cualquier dato nuevo
+        que use esta función tiene que marcarlo al cambiar.
         """
         nivel = 1.0
         categoria = "alta"
         motivo = "patron de parpadeo normal"
+        args_motivo: Tuple[float, ...] = ()
 
         # 1) Somnolencia fuerte: microsueños recientes
         # De momento, usamos el conteo total como referencia (se puede refinar con ventanas de tiempo)
@@ -423,19 +733,17 @@ class ContadorEventosSomnolencia:
             nivel = 0.2
             categoria = "baja"
             motivo = "microsuenos detectados (somnolencia)"
-            return AtencionConductor(nivel=nivel, categoria=categoria, motivo=motivo)
+            return AtencionConductor(nivel=nivel, categoria=categoria, plantilla_motivo=motivo)
 
         # 2) Inter-parpadeos y mirada fija: posible mente en la nube
         if len(self._historial_interparpadeos) >= 3:
-            promedio_inter = sum(self._historial_interparpadeos) / len(self._historial_interparpadeos)
+            promedio_inter = self._suma_interparpadeos / (1000.0 * len(self._historial_interparpadeos))
 
             if promedio_inter > self.interparpadeo_atencion_baja:
                 nivel = 0.5
                 categoria = "media"
-                motivo = (
-                    f"inter-parpadeo promedio largo ({promedio_inter:.1f}s) "
-                    "posible desatencion / mente en la nube"
-                )
+                motivo = MOTIVO_INTER_LARGO
+                args_motivo = (promedio_inter,)
             else:
                 nivel = 0.9
                 categoria = "alta"
@@ -449,27 +757,39 @@ class ContadorEventosSomnolencia:
         # 3) (Futuro) Respuestas a estímulos de la pulsera:
         # Podríamos bajar la atención si las latencias promedio son altas
         # o si muchos estímulos no reciben respuesta.
-        # De momento, solo dejamos el hook.
+        # De momento, solo dejamos el hook (al activarlo, registrar_respuesta()
+        # tiene que poner _atencion_sucia = True).
         # Ejemplo (comentado):
         #
         # if self._latencias_respuesta:
-        #     lat_prom = sum(self._latencias_respuesta) / len(self._latencias_respuesta)
+        #     lat_prom = self._suma_latencias / len(self._latencias_respuesta)
         #     if lat_prom > 4.0:  # por ejemplo, >4s muy lento
         #         nivel = min(nivel, 0.6)
         #         categoria = "media"
-        #         motivo += f" + respuestas lentas a estimulos (lat_prom={lat_prom:.1f}s)"
+        #         motivo += " + respuestas lentas a estimulos (lat_prom={:.1f}s)"
+        #         args_motivo += (lat_prom,)
 
-        return AtencionConductor(nivel=nivel, categoria=categoria, motivo=motivo)
+        return AtencionConductor(
+            nivel=nivel, categoria=categoria, plantilla_motivo=motivo, args_motivo=args_motivo
+        )
     
-    def obtener_estadisticas(self) -> dict:
+    def obtener_estadisticas(self) -> ResumenEventos:
         """
         Devuelve un resumen de conteos acumulados de eventos.
         Útil para depuración y visualización.
+
+        El resumen es inmutable: mientras no haya eventos nuevos se devuelve
+        el mismo objeto, sin armar uno por frame.
         """
-        return {
-            "parpadeos_total": self._conteo_parpadeos_total,
-            "microsuenos_total": self._conteo_microsuenos_total,
-            "bostezos_total": self._conteo_bostezos_total,
-            "cabeceos_total": self._conteo_cabeceos_total,
-        }
+        parpadeos = self._conteo_parpadeos_total
+        microsuenos = self._conteo_microsuenos_total
+        bostezos = self._conteo_bostezos_total
+        cabeceos = self._conteo_cabeceos_total
+        estadisticas = self._estadisticas
+        # Los conteos solo crecen: si la suma total no cambió, no cambió ninguno
+        if parpadeos + microsuenos + bostezos + cabeceos != sum(estadisticas):
+            estadisticas = self._estadisticas = ResumenEventos(
+                parpadeos, microsuenos, bostezos, cabeceos
+            )
+        return estadisticas
     
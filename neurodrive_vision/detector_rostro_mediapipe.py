@@ -1,8 +1,11 @@
 from __future__ import annotations
 import logging
+import threading
 import time
+from itertools import chain
+from operator import attrgetter
 from dataclasses import dataclass, field #más claro para objetos que solo almacenan datos.
-from typing import List, Tuple, Optional, Dict
+from typing import Tuple, Optional, NamedTuple
 from abc import ABC, abstractmethod
 
 import cv2
@@ -18,6 +21,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# (x, y, z) de un landmark de MediaPipe, resuelto en C (sin lambda ni tupla armada en Python)
+_coordenadas_landmark = attrgetter("x", "y", "z")
+
+# Desplazamientos (dy, dx) de la cruz de 5 píxeles con la que dibujar_malla pinta
+# cada punto: centro, arriba, abajo, izquierda, derecha
+_OFFSETS_PUNTO_Y = np.array([0, -1, 1, 0, 0], dtype=np.int32)
+_OFFSETS_PUNTO_X = np.array([0, 0, 0, -1, 1], dtype=np.int32)
+
 
 class ErrorDetectorRostro(Exception):                               #   Excepción base para errores en detección de rostro
     
@@ -48,19 +59,30 @@ class ErrorProcesamientoFrame(ErrorDetectorRostro):
 #   Estructuras de datos
 # ==============================
 
-@dataclass
+@dataclass(slots=True)
 class DatosRostro:
 
     rostro_presente: bool
-    puntos_normalizados: Optional[List[Tuple[float, float, float]]] = None
-    puntos_pixeles: Optional[List[Tuple[int, int]]] = None
+    puntos_normalizados: Optional[np.ndarray] = None    # (N, 3) float32: x, y, z normalizados
+    puntos_pixeles: Optional[np.ndarray] = None         # (N, 2) int32: x, y en píxeles, dentro del frame
     resolucion: Optional[Tuple[int, int]] = None
     confiabilidad: float = 0.0
-    timestamp: float = field(default_factory=time.time)
+    timestamp: float = field(default_factory=time.monotonic)    # Reloj monotónico: solo sirve para medir intervalos
     tiempo_procesamiento: float = 0.0
 
 
-@dataclass
+class ReporteMetricas(NamedTuple):
+    """Resumen de MetricasDetector.obtener_reporte(). ._asdict() si hace falta como dict."""
+    frames_procesados: int
+    frames_con_rostro: int
+    frames_sin_rostro: int
+    errores: int
+    tasa_deteccion_pct: float
+    tiempo_promedio_ms: float
+    fps_promedio: float
+
+
+@dataclass(slots=True)
 class MetricasDetector:             #Métricas de rendimiento del detector para monitorear el comportamiento en Raspberry Pi.
                                     #Si todo va bien lo podemos borrar
     frames_procesados: int = 0
@@ -68,11 +90,27 @@ class MetricasDetector:             #Métricas de rendimiento del detector para
     frames_sin_rostro: int = 0
     errores_procesamiento: int = 0
     tiempo_total_procesamiento: float = 0.0
-    tiempo_promedio_frame: float = 0.0
-    fps_promedio: float = 0.0
+    _reporte: Optional[ReporteMetricas] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Promedios calculados recién al consultarlos (no en cada frame)
+    @property
+    def tiempo_promedio_frame(self) -> float:
+        if self.frames_procesados == 0:
+            return 0.0
+        return self.tiempo_total_procesamiento / self.frames_procesados
+    
+    @property
+    def fps_promedio(self) -> float:
+        tiempo_promedio = self.tiempo_promedio_frame
+        return 1.0 / tiempo_promedio if tiempo_promedio > 0 else 0.0
     
     def actualizar(self, datos_rostro: DatosRostro, error: bool = False) -> None:
-        """Actualiza las métricas con el resultado de un frame."""
+        """
+        Actualiza las métricas con el resultado de un frame.
+
+        Son solo dos sumas por frame: juntar los frames en un lote para volcarlos
+        después costaría más (una tupla y un append por frame) que actualizar acá.
+        """
         self.frames_procesados += 1
         
         if error:
@@ -85,29 +123,33 @@ class MetricasDetector:             #Métricas de rendimiento del detector para
             self.frames_sin_rostro += 1
         
         self.tiempo_total_procesamiento += datos_rostro.tiempo_procesamiento
-        self.tiempo_promedio_frame = (
-            self.tiempo_total_procesamiento / self.frames_procesados
-        )
-        
-        if self.tiempo_promedio_frame > 0:
-            self.fps_promedio = 1.0 / self.tiempo_promedio_frame
     
-    def obtener_reporte(self) -> Dict[str, float]:
-        """Retorna un diccionario con las métricas."""
+    def obtener_reporte(self) -> ReporteMetricas:
+        """
+        Retorna las métricas como ReporteMetricas.
+
+        Cada frame procesado incrementa frames_procesados, así que mientras no
+        cambie se devuelve el mismo reporte sin volver a armarlo.
+        """
+        reporte = self._reporte
+        if reporte is not None and reporte.frames_procesados == self.frames_procesados:
+            return reporte
+        
         tasa_deteccion = (
             (self.frames_con_rostro / self.frames_procesados * 100)
             if self.frames_procesados > 0 else 0.0
         )
         
-        return {
-            "frames_procesados": self.frames_procesados,
-            "frames_con_rostro": self.frames_con_rostro,
-            "frames_sin_rostro": self.frames_sin_rostro,
-            "errores": self.errores_procesamiento,
-            "tasa_deteccion_pct": round(tasa_deteccion, 2),
-            "tiempo_promedio_ms": round(self.tiempo_promedio_frame * 1000, 2),
-            "fps_promedio": round(self.fps_promedio, 2),
-        }
+        reporte = self._reporte = ReporteMetricas(
+            frames_procesados=self.frames_procesados,
+            frames_con_rostro=self.frames_con_rostro,
+            frames_sin_rostro=self.frames_sin_rostro,
+            errores=self.errores_procesamiento,
+            tasa_deteccion_pct=round(tasa_deteccion, 2),
+            tiempo_promedio_ms=round(self.tiempo_promedio_frame * 1000, 2),
+            fps_promedio=round(self.fps_promedio, 2),
+        )
+        return reporte
     
     def reiniciar(self) -> None:
         """Reinicia todas las métricas a cero."""
@@ -146,6 +188,13 @@ class DetectorRostroBase(ABC):
 
 class DetectorRostroMediaPipe(DetectorRostroBase):
 
+    # Escala adaptativa de la resolución de inferencia (ver latencia_objetivo_ms)
+    ESCALA_MINIMA = 0.5             # No bajar de la mitad de la resolución base
+    PASO_ESCALA = 0.1               # Cuánto sube o baja la escala en cada ajuste
+    ALFA_LATENCIA = 0.2             # Suavizado EMA del tiempo de procesamiento
+    MARGEN_SUBIDA = 0.7             # Se vuelve a subir la escala con latencia < objetivo * MARGEN_SUBIDA
+    TIMEOUT_RESULTADO_HILO = 1.0    # segundos de espera máxima por un resultado del hilo de inferencia
+
     def __init__(
         self,
         max_rostros: int = 1,
@@ -154,7 +203,12 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
         refinar_contornos: bool = True,
         modelo_complejidad: int = 1,
         habilitar_cache: bool = True,
-        max_frames_sin_deteccion: int = 5
+        max_frames_sin_deteccion: int = 5,
+        resolucion_inferencia: Optional[Tuple[int, int]] = None,    # (ancho, alto) con el que corre MediaPipe. None = resolución del frame
+        usar_opencl: bool = False,                                  # Redimensionado + BGR->RGB con OpenCL (T-API) si hay un dispositivo disponible
+        latencia_objetivo_ms: Optional[float] = None,               # Si el promedio de tiempo_procesamiento la supera se baja la resolución de inferencia. None = escala fija
+        reutilizar_resultado: bool = False,                         # procesar_frame devuelve siempre el mismo DatosRostro actualizado (ver _armar_resultado)
+        formato_entrada: str = "BGR"                                # "RGB" si la fuente ya entrega RGB (p.ej. picamera2): se saltea la conversión
     ) -> None:
 
         if not MEDIAPIPE_DISPONIBLE:
@@ -166,14 +220,56 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
         self._max_rostros = max_rostros
         self._habilitar_cache = habilitar_cache
         self._max_frames_sin_deteccion = max_frames_sin_deteccion
+        self._resolucion_inferencia = resolucion_inferencia
+        
+        if formato_entrada not in ("BGR", "RGB"):
+            raise ErrorInicializacionDetector(
+                f"formato_entrada inválido: {formato_entrada!r} (opciones: 'BGR', 'RGB')"
+            )
+        self._entrada_rgb = formato_entrada == "RGB"
+        
+        # Escala adaptativa sobre la resolución de inferencia (1.0 = sin reducir)
+        self._latencia_objetivo: Optional[float] = (
+            latencia_objetivo_ms / 1000.0 if latencia_objetivo_ms is not None else None
+        )
+        self._escala: float = 1.0
+        self._latencia_promedio: Optional[float] = None
+        
+        # OpenCL solo si se pidió y OpenCV encuentra un dispositivo; si no, camino en CPU
+        self._usar_opencl = usar_opencl and cv2.ocl.haveOpenCL()
+        if usar_opencl and not self._usar_opencl:
+            logger.warning("OpenCL no disponible en este equipo, el preprocesado sigue en CPU")
+        if self._usar_opencl:
+            cv2.ocl.setUseOpenCL(True)
         
         # Caché para estabilidad
         self._ultimo_resultado: Optional[DatosRostro] = None
         self._frames_consecutivos_sin_rostro: int = 0
         
+        # Con un único consumidor que usa el resultado antes del próximo frame (como el
+        # loop de main.py) no hace falta un DatosRostro nuevo por frame. Quien necesite
+        # guardarlo entre frames tiene que copiarlo
+        self._resultado_reutilizable: Optional[DatosRostro] = (
+            DatosRostro(rostro_presente=False) if reutilizar_resultado else None
+        )
+        
         # Métricas
         self._metricas = MetricasDetector()
         
+        # Buffers reutilizados entre frames (se reservan con el primer frame)
+        self._buf_inferencia: Optional[np.ndarray] = None
+        self._rgb_buf: Optional[np.ndarray] = None
+        self._buf_mascara: Optional[np.ndarray] = None     # máscara de dibujar_malla cuando no se pasa `out`
+        
+        # Hilo de inferencia opcional con un slot de entrada y uno de salida (ver iniciar_hilo)
+        self._hilo_inferencia: Optional[threading.Thread] = None
+        self._detener_hilo = threading.Event()
+        self._frame_pendiente_listo = threading.Event()
+        self._resultado_nuevo = threading.Event()
+        self._lock_hilo = threading.Lock()
+        self._frame_pendiente: Optional[np.ndarray] = None
+        self._resultado_hilo: Optional[DatosRostro] = None
+        
         try:
             self._mp_face_mesh = mp.solutions.face_mesh
             
@@ -188,29 +284,53 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
                 # pero se puede configurar internamente si se necesita
             )
             
-            # Utilidades de dibujo (para debug)
-            self._mp_drawing = mp.solutions.drawing_utils
-            self._mp_drawing_styles = mp.solutions.drawing_styles
-            
             logger.info(
                 f"DetectorRostroMediaPipe inicializado correctamente "
                 f"(max_rostros={max_rostros}, refine_landmarks={refinar_contornos}, "
-                f"cache={habilitar_cache})"
+                f"cache={habilitar_cache}, resolucion_inferencia={resolucion_inferencia}, "
+                f"opencl={self._usar_opencl}, latencia_objetivo_ms={latencia_objetivo_ms}, "
+                f"formato_entrada={formato_entrada})"
             )
             
         except Exception as e:
             raise ErrorInicializacionDetector(
                 f"Error al inicializar MediaPipe FaceMesh: {e}"
             )
+        
+        self._precalentar()
+
+    def _precalentar(self) -> None:
+        """
+        Corre FaceMesh una vez sobre un frame negro.
+
+        MediaPipe arma el grafo y el intérprete TFLite recién en el primer process();
+        así ese costo se paga al iniciar y no en el primer frame real. Un frame
+        negro no tiene rostro, por lo que no queda estado de seguimiento. Si falla
+        solo se avisa: el primer frame real volverá a intentarlo.
+        """
+        ancho, alto = self._resolucion_inferencia or (640, 480)
+        frame_negro = np.zeros((alto, ancho, 3), dtype=np.uint8)
+        frame_negro.flags.writeable = False
+        
+        inicio = time.perf_counter()
+        try:
+            self._face_mesh.process(frame_negro)
+        except Exception as e:
+            logger.warning(f"No se pudo precalentar FaceMesh: {e}")
+            return
+        logger.info(f"FaceMesh precalentado en {(time.perf_counter() - inicio) * 1000:.0f} ms")
 
     def procesar_frame(self, frame_bgr: np.ndarray) -> DatosRostro:
 
+        # Un solo timestamp por frame, tomado al recibirlo: todas las ramas (rostro,
+        # caché, sin rostro, error) informan el mismo instante
         tiempo_inicio = time.perf_counter()
+        marca_tiempo = time.monotonic()
         
         # Validación temprana
         if frame_bgr is None or frame_bgr.size == 0:
             logger.warning("Frame vacío o None recibido")
-            resultado = self._crear_resultado_vacio(None)
+            resultado = self._crear_resultado_vacio(None, marca_tiempo)
             self._metricas.actualizar(resultado)
             return resultado
         
@@ -218,8 +338,54 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
         resolucion = (ancho, alto)
         
         try:
-            # MediaPipe requiere RGB
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            # Inferencia a menor resolución: los landmarks salen normalizados (0..1),
+            # así que se escalan con el tamaño original y no hay que corregir nada después
+            resolucion_inferencia = self._resolucion_a_inferir(resolucion)
+            redimensionar = resolucion_inferencia != resolucion
+            
+            # Con entrada RGB y sin redimensionar no hay nada que hacer en la GPU
+            if self._usar_opencl and (redimensionar or not self._entrada_rgb):
+                frame_rgb = self._preprocesar_opencl(frame_bgr, resolucion_inferencia if redimensionar else None)
+            else:
+                frame_entrada = frame_bgr
+                if redimensionar:
+                    ancho_inf, alto_inf = resolucion_inferencia
+                    buf = self._buf_inferencia
+                    if (
+                        buf is None
+                        or buf.shape[:2] != (alto_inf, ancho_inf)
+                        or buf.dtype != frame_bgr.dtype
+                    ):
+                        self._buf_inferencia = np.empty((alto_inf, ancho_inf, 3), dtype=frame_bgr.dtype)
+                    frame_entrada = cv2.resize(
+                        frame_bgr,
+                        resolucion_inferencia,
+                        dst=self._buf_inferencia,
+                        interpolation=cv2.INTER_AREA,
+                    )
+                
+                if self._entrada_rgb:
+                    # Ya viene en RGB: solo hace falta que sea C-contiguo (sin copia si ya
+                    # lo es). Se marca de solo lectura una vista, no el array del llamador
+                    # ni el buffer de redimensionado, que se vuelven a escribir
+                    frame_rgb = np.ascontiguousarray(frame_entrada).view()
+                else:
+                    # MediaPipe requiere RGB. La conversión se escribe en un buffer propio
+                    # para no reservar una imagen nueva en cada frame; solo se vuelve a
+                    # reservar si cambia el tamaño del frame (p.ej. al cambiar de fuente).
+                    # La vista frame[:, :, ::-1] no sirve: MediaPipe exige un array
+                    # C-contiguo y la copiaría igual, reservando memoria en cada frame.
+                    # FaceLandmarker (Tasks API) tampoco la evita: mp.Image con SRGB pide
+                    # el mismo RGB contiguo, y además necesita un modelo .task aparte
+                    rgb_buf = self._rgb_buf
+                    if (
+                        rgb_buf is None
+                        or rgb_buf.shape != frame_entrada.shape
+                        or rgb_buf.dtype != frame_entrada.dtype
+                    ):
+                        self._rgb_buf = np.empty_like(frame_entrada)
+                    self._rgb_buf.flags.writeable = True    # cv2 no escribe sobre arrays de solo lectura
+                    frame_rgb = cv2.cvtColor(frame_entrada, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
             
             # Optimización: marcar como no-escribible
             frame_rgb.flags.writeable = False
@@ -229,6 +395,8 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
             
             # Calcular tiempo de procesamiento
             tiempo_procesamiento = time.perf_counter() - tiempo_inicio
+            if self._latencia_objetivo is not None:
+                self._ajustar_escala(tiempo_procesamiento)
             
             # Procesar resultados
             if not resultados.multi_face_landmarks:
@@ -245,28 +413,38 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
                         f"(frames sin detección: {self._frames_consecutivos_sin_rostro})"
                     )
                     
-                    # Actualizar timestamp del resultado cacheado
-                    resultado = DatosRostro(
-                        rostro_presente=True,
-                        puntos_normalizados=self._ultimo_resultado.puntos_normalizados,
-                        puntos_pixeles=self._ultimo_resultado.puntos_pixeles,
-                        resolucion=resolucion,
-                        confiabilidad=0.8,  # Reducir confianza por ser caché
-                        timestamp=time.time(),
-                        tiempo_procesamiento=tiempo_procesamiento
-                    )
+                    if self._resultado_reutilizable is not None:
+                        # Con reutilizar_resultado el llamador ya acepta que el objeto se
+                        # reescriba: mismo DatosRostro del caché, solo con tiempos y
+                        # confianza al día. Si no, el objeto ya se entregó como detección
+                        # propia y no hay que tocarlo (iniciar_hilo excluye este modo)
+                        resultado = self._ultimo_resultado
+                        resultado.resolucion = resolucion
+                        resultado.confiabilidad = 0.8  # Reducir confianza por ser caché
+                        resultado.timestamp = marca_tiempo
+                        resultado.tiempo_procesamiento = tiempo_procesamiento
+                    else:
+                        resultado = self._armar_resultado(
+                            rostro_presente=True,
+                            puntos_normalizados=self._ultimo_resultado.puntos_normalizados,
+                            puntos_pixeles=self._ultimo_resultado.puntos_pixeles,
+                            resolucion=resolucion,
+                            confiabilidad=0.8,  # Reducir confianza por ser caché
+                            timestamp=marca_tiempo,
+                            tiempo_procesamiento=tiempo_procesamiento
+                        )
                 else:
                     # Sin caché o caché expirado
                     if self._frames_consecutivos_sin_rostro > self._max_frames_sin_deteccion:
                         self._ultimo_resultado = None  # Invalidar caché
                     
-                    resultado = DatosRostro(
+                    resultado = self._armar_resultado(
                         rostro_presente=False,
                         puntos_normalizados=None,
                         puntos_pixeles=None,
                         resolucion=resolucion,
                         confiabilidad=0.0,
-                        timestamp=time.time(),
+                        timestamp=marca_tiempo,
                         tiempo_procesamiento=tiempo_procesamiento
                     )
                 
@@ -279,29 +457,30 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
             # Extraer landmarks del primer rostro
             landmarks_rostro = resultados.multi_face_landmarks[0].landmark
             
-            # Convertir a listas de tuplas
-            puntos_normalizados: List[Tuple[float, float, float]] = []
-            puntos_pixeles: List[Tuple[int, int]] = []
+            # Un solo array (N, 3) en lugar de N tuplas. MediaPipe entrega float32,
+            # así que guardarlos en float32 no pierde precisión. fromiter con count
+            # reserva el array de una vez y lo llena sin lista intermedia
+            n_puntos = len(landmarks_rostro)
+            puntos_normalizados = np.fromiter(
+                chain.from_iterable(map(_coordenadas_landmark, landmarks_rostro)),
+                dtype=np.float32,
+                count=3 * n_puntos,
+            ).reshape(n_puntos, 3)
             
-            for punto in landmarks_rostro:
-                x_norm = float(punto.x)
-                y_norm = float(punto.y)
-                z_norm = float(punto.z)
-                
-                puntos_normalizados.append((x_norm, y_norm, z_norm))
-                
-                # Clipping para evitar puntos fuera del frame
-                x_px = max(0, min(ancho - 1, int(x_norm * ancho)))
-                y_px = max(0, min(alto - 1, int(y_norm * alto)))
-                puntos_pixeles.append((x_px, y_px))
+            # A píxeles de una vez: escala en float64, truncado (como int()) y clipping
+            # para evitar puntos fuera del frame
+            puntos_pixeles = np.multiply(
+                puntos_normalizados[:, :2], (ancho, alto), dtype=np.float64
+            ).astype(np.int32)
+            np.clip(puntos_pixeles, 0, (ancho - 1, alto - 1), out=puntos_pixeles)
             
-            resultado = DatosRostro(
+            resultado = self._armar_resultado(
                 rostro_presente=True,
                 puntos_normalizados=puntos_normalizados,
                 puntos_pixeles=puntos_pixeles,
                 resolucion=resolucion,
                 confiabilidad=1.0,
-                timestamp=time.time(),
+                timestamp=marca_tiempo,
                 tiempo_procesamiento=tiempo_procesamiento
             )
             
@@ -314,25 +493,124 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
             
         except cv2.error as e:
             logger.error(f"Error de OpenCV al procesar frame: {e}")
-            resultado = self._crear_resultado_vacio(resolucion)
+            resultado = self._crear_resultado_vacio(resolucion, marca_tiempo)
             self._metricas.actualizar(resultado, error=True)
             return resultado
             
         except Exception as e:
             logger.error(f"Error inesperado al procesar frame: {e}", exc_info=True)
-            resultado = self._crear_resultado_vacio(resolucion)
+            resultado = self._crear_resultado_vacio(resolucion, marca_tiempo)
             self._metricas.actualizar(resultado, error=True)
             return resultado
 
-    def _crear_resultado_vacio(self, resolucion: Optional[Tuple[int, int]]) -> DatosRostro:
+    def _resolucion_a_inferir(self, resolucion: Tuple[int, int]) -> Tuple[int, int]:
+        """(ancho, alto) con el que corre MediaPipe: la base configurada por la escala adaptativa."""
+        base = self._resolucion_inferencia if self._resolucion_inferencia is not None else resolucion
+        if self._escala >= 1.0:
+            return base
+        return (max(1, round(base[0] * self._escala)), max(1, round(base[1] * self._escala)))
+
+    def _ajustar_escala(self, tiempo_procesamiento: float) -> None:
+        """
+        Baja o sube la escala de inferencia según el promedio (EMA) de la latencia.
+
+        Por encima del objetivo se reduce PASO_ESCALA (hasta ESCALA_MINIMA); por debajo
+        de objetivo * MARGEN_SUBIDA se vuelve a subir hasta 1.0. La banda intermedia
+        evita que la escala oscile frame a frame.
+        """
+        promedio = self._latencia_promedio
+        if promedio is None:
+            promedio = tiempo_procesamiento
+        else:
+            promedio += self.ALFA_LATENCIA * (tiempo_procesamiento - promedio)
+        self._latencia_promedio = promedio
+
+        escala = self._escala
+        if promedio > self._latencia_objetivo and escala > self.ESCALA_MINIMA:
+            escala = max(self.ESCALA_MINIMA, escala - self.PASO_ESCALA)
+        elif promedio < self._latencia_objetivo * self.MARGEN_SUBIDA and escala < 1.0:
+            escala = min(1.0, escala + self.PASO_ESCALA)
+        else:
+            return
+
+        # Redondeo para que los pasos sucesivos no acumulen error de float
+        self._escala = round(escala, 2)
+        logger.debug(
+            f"Escala de inferencia ajustada a {self._escala:.2f} "
+            f"(latencia promedio {promedio * 1000:.1f} ms)"
+        )
+
+    def _preprocesar_opencl(
+        self,
+        frame_bgr: np.ndarray,
+        resolucion_inferencia: Optional[Tuple[int, int]]
+    ) -> np.ndarray:
+        """
+        Redimensionado (si resolucion_inferencia no es None) + BGR->RGB (si la entrada
+        no es RGB) sobre cv2.UMat, para que OpenCV los ejecute con OpenCL.
+
+        MediaPipe corre en CPU, así que el resultado se descarga una vez (UMat.get())
+        ya reducido y convertido.
+        """
+        imagen = cv2.UMat(frame_bgr)
+        if resolucion_inferencia is not None:
+            imagen = cv2.resize(imagen, resolucion_inferencia, interpolation=cv2.INTER_AREA)
+        if not self._entrada_rgb:
+            imagen = cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB)
+        return imagen.get()
+
+    def _armar_resultado(
+        self,
+        rostro_presente: bool,
+        puntos_normalizados: Optional[np.ndarray],
+        puntos_pixeles: Optional[np.ndarray],
+        resolucion: Optional[Tuple[int, int]],
+        confiabilidad: float,
+        timestamp: float,
+        tiempo_procesamiento: float
+    ) -> DatosRostro:
+        """
+        DatosRostro de un frame: uno nuevo, o con reutilizar_resultado el mismo
+        objeto de siempre con sus campos actualizados.
+        """
+        datos = self._resultado_reutilizable
+        if datos is None:
+            return DatosRostro(
+                rostro_presente=rostro_presente,
+                puntos_normalizados=puntos_normalizados,
+                puntos_pixeles=puntos_pixeles,
+                resolucion=resolucion,
+                confiabilidad=confiabilidad,
+                timestamp=timestamp,
+                tiempo_procesamiento=tiempo_procesamiento,
+            )
+        
+        # El caché apunta a este mismo objeto: si se pisan sus puntos deja de servir
+        if not rostro_presente and self._ultimo_resultado is datos:
+            self._ultimo_resultado = None
+        
+        datos.rostro_presente = rostro_presente
+        datos.puntos_normalizados = puntos_normalizados
+        datos.puntos_pixeles = puntos_pixeles
+        datos.resolucion = resolucion
+        datos.confiabilidad = confiabilidad
+        datos.timestamp = timestamp
+        datos.tiempo_procesamiento = tiempo_procesamiento
+        return datos
+
+    def _crear_resultado_vacio(
+        self,
+        resolucion: Optional[Tuple[int, int]],
+        marca_tiempo: float
+    ) -> DatosRostro:
         """Helper para crear un DatosRostro vacío."""
-        return DatosRostro(
+        return self._armar_resultado(
             rostro_presente=False,
             puntos_normalizados=None,
             puntos_pixeles=None,
             resolucion=resolucion,
             confiabilidad=0.0,
-            timestamp=time.time(),
+            timestamp=marca_tiempo,
             tiempo_procesamiento=0.0
         )
 
@@ -343,19 +621,52 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
         dibujar_contornos: bool = False,
         dibujar_puntos: bool = True,
         grosor_linea: int = 1,
-        color_contorno: Tuple[int, int, int] = (255, 255, 0)
+        color_contorno: Tuple[int, int, int] = (255, 255, 0),
+        out: Optional[np.ndarray] = None
     ) -> np.ndarray:
-
-        # Creamos una imagen negra del mismo tamaño que el frame original
-        mascara = np.zeros_like(frame_bgr)
+        """
+        Dibuja los puntos del rostro sobre una máscara negra del tamaño del frame.
+
+        Si se pasa `out` (mismo shape y dtype que el frame), se limpia y se dibuja
+        sobre él en lugar de reservar una imagen nueva en cada llamada. Si no, se usa
+        una máscara propia del detector: el resultado se sobrescribe en la próxima
+        llamada, así que no hay que guardarlo entre frames (copiarlo si hace falta).
+        """
+        if out is None:
+            # Máscara reservada una vez y limpiada con fill(0); solo se vuelve a
+            # reservar si cambia el tamaño o el tipo del frame
+            mascara = self._buf_mascara
+            if (
+                mascara is None
+                or mascara.shape != frame_bgr.shape
+                or mascara.dtype != frame_bgr.dtype
+            ):
+                mascara = self._buf_mascara = np.zeros_like(frame_bgr)
+            else:
+                mascara.fill(0)
+        else:
+            if out.shape != frame_bgr.shape or out.dtype != frame_bgr.dtype:
+                raise ValueError(
+                    f"'out' debe tener shape {frame_bgr.shape} y dtype {frame_bgr.dtype}, "
+                    f"se recibió {out.shape} / {out.dtype}"
+                )
+            out.fill(0)
+            mascara = out
 
         if not datos_rostro.rostro_presente:
             # No hay rostro -> devolvemos solo fondo negro
             return mascara
 
         if dibujar_puntos and datos_rostro.puntos_pixeles is not None:
-            for (x_px, y_px) in datos_rostro.puntos_pixeles:
-                cv2.circle(mascara, (x_px, y_px), 1, color_contorno, -1)
+            # Un círculo relleno de radio 1 de cv2 es una cruz de 5 píxeles: se pintan
+            # todos los puntos con una sola asignación indexada en lugar de una llamada
+            # a cv2.circle por punto. En el borde, clip lleva el píxel que queda afuera
+            # al centro (ya pintado), así que el resultado es igual al de cv2
+            alto_m, ancho_m = mascara.shape[:2]
+            puntos = datos_rostro.puntos_pixeles
+            xs = np.clip(puntos[:, 0, None] + _OFFSETS_PUNTO_X, 0, ancho_m - 1)
+            ys = np.clip(puntos[:, 1, None] + _OFFSETS_PUNTO_Y, 0, alto_m - 1)
+            mascara[ys, xs] = color_contorno
 
         return mascara
 
@@ -375,8 +686,110 @@ class DetectorRostroMediaPipe(DetectorRostroBase):
         self._frames_consecutivos_sin_rostro = 0
         logger.debug("Caché de resultados invalidado")
 
+    # ---------- Inferencia en un hilo propio ----------
+
+    def iniciar_hilo(self) -> None:
+        """
+        Lanza un hilo que corre procesar_frame sobre el último frame enviado.
+
+        Así la inferencia de MediaPipe se solapa con la captura y el resto del loop:
+        el llamador entrega frames con enviar_frame() sin bloquearse y toma el
+        resultado más nuevo con obtener_resultado_ultimo(). Mientras el hilo está
+        activo no hay que llamar a procesar_frame() desde otro hilo.
+        """
+        if self._hilo_inferencia is not None and self._hilo_inferencia.is_alive():
+            return
+        if self._resultado_reutilizable is not None:
+            # El hilo reescribiría el resultado mientras el llamador todavía lo lee
+            raise ErrorInicializacionDetector(
+                "reutilizar_resultado no es compatible con el hilo de inferencia"
+            )
+        
+        self._detener_hilo.clear()
+        self._frame_pendiente_listo.clear()
+        self._resultado_nuevo.clear()
+        self._frame_pendiente = None
+        self._resultado_hilo = None
+        
+        self._hilo_inferencia = threading.Thread(
+            target=self._loop_inferencia, name="DetectorRostroMediaPipe", daemon=True
+        )
+        self._hilo_inferencia.start()
+        logger.info("Hilo de inferencia iniciado")
+
+    def enviar_frame(self, frame_bgr: np.ndarray) -> None:
+        """
+        Deja un frame para el hilo de inferencia, sin esperar.
+
+        Si el hilo todavía no tomó el anterior, se reemplaza: siempre se procesa el
+        frame más nuevo y no se acumula atraso. El frame no debe modificarse después.
+        """
+        if self._hilo_inferencia is None:
+            raise ErrorProcesamientoFrame(
+                "El hilo de inferencia no fue iniciado. Llama a 'iniciar_hilo()' primero."
+            )
+        with self._lock_hilo:
+            self._frame_pendiente = frame_bgr
+            self._frame_pendiente_listo.set()
+
+    def obtener_resultado_ultimo(self, timeout: float = 0.0) -> Optional[DatosRostro]:
+        """
+        Retorna el resultado más nuevo del hilo de inferencia, o None si no hay uno
+        nuevo desde la última consulta (esperando hasta `timeout` segundos).
+        """
+        if self._hilo_inferencia is None:
+            raise ErrorProcesamientoFrame(
+                "El hilo de inferencia no fue iniciado. Llama a 'iniciar_hilo()' primero."
+            )
+        if not self._resultado_nuevo.wait(timeout):
+            return None
+        with self._lock_hilo:
+            resultado = self._resultado_hilo
+            self._resultado_nuevo.clear()
+        return resultado
+
+    def _loop_inferencia(self) -> None:
+        """Consumidor: toma el frame pendiente, lo procesa y publica el resultado."""
+        detenido = self._detener_hilo.is_set
+        esperar_frame = self._frame_pendiente_listo.wait
+        lock = self._lock_hilo
+        procesar = self.procesar_frame
+        
+        while not detenido():
+            if not esperar_frame(self.TIMEOUT_RESULTADO_HILO):
+                continue
+            with lock:
+                frame = self._frame_pendiente
+                self._frame_pendiente = None
+                self._frame_pendiente_listo.clear()
+            if frame is None or detenido():
+                continue
+            
+            # procesar_frame ya atrapa sus errores y devuelve un resultado vacío
+            resultado = procesar(frame)
+            with lock:
+                self._resultado_hilo = resultado
+                self._resultado_nuevo.set()
+        
+        logger.info("Hilo de inferencia finalizado")
+
+    def detener_hilo(self) -> None:
+        """Detiene el hilo de inferencia y espera a que termine el frame en curso."""
+        hilo = getattr(self, "_hilo_inferencia", None)
+        if hilo is None:
+            return
+        self._detener_hilo.set()
+        self._frame_pendiente_listo.set()   # despierta al hilo si estaba esperando un frame
+        if hilo is not threading.current_thread():
+            # Sin timeout: liberar() cierra FaceMesh después de esto, y no puede
+            # hacerlo mientras el hilo sigue dentro de process()
+            hilo.join()
+        self._hilo_inferencia = None
+
     def liberar(self) -> None:
         """Libera recursos de MediaPipe FaceMesh."""
+        # FaceMesh no puede cerrarse mientras el hilo lo está usando
+        self.detener_hilo()
         if hasattr(self, '_face_mesh') and self._face_mesh is not None:
             self._face_mesh.close()
             self._face_mesh = None
@@ -11,11 +11,13 @@ por los módulos de detección de eventos de somnolencia.
 from __future__ import annotations
 
 import logging
+import math
 from dataclasses import dataclass, field
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, List, Dict
 
 import numpy as np
 
+from .aceleracion import NUMBA_DISPONIBLE, njit
 from .detector_rostro_mediapipe import DatosRostro
 
 logger = logging.getLogger(__name__)
@@ -60,11 +62,46 @@ INDICES_FACEMESH: Dict[str, Dict[str, List[int] | int]] = {
 }
 
 
+# Los mismos índices por defecto ya armados como arrays, compartidos por todos los
+# calculadores que usan INDICES_FACEMESH (ver _indices_ojos / _indices_boca / _indices_cabeza).
+# Forma (2, 6): fila 0 = ojo izquierdo, fila 1 = ojo derecho
+IDX_OJOS_FACEMESH = np.array(
+    [INDICES_FACEMESH["ojos"]["izquierdo"], INDICES_FACEMESH["ojos"]["derecho"]],  # type: ignore
+    dtype=np.intp,
+)
+# Orden: comisura izquierda, comisura derecha, labio superior, labio inferior
+IDX_BOCA_FACEMESH = np.array(
+    [
+        INDICES_FACEMESH["boca"]["comisura_izquierda"],  # type: ignore
+        INDICES_FACEMESH["boca"]["comisura_derecha"],    # type: ignore
+        INDICES_FACEMESH["boca"]["labio_superior"],      # type: ignore
+        INDICES_FACEMESH["boca"]["labio_inferior"],      # type: ignore
+    ],
+    dtype=np.intp,
+)
+# Orden: nariz, mentón
+IDX_CABEZA_FACEMESH = np.array(
+    [INDICES_FACEMESH["cabeza"]["nariz"], INDICES_FACEMESH["cabeza"]["menton"]],  # type: ignore
+    dtype=np.intp,
+)
+IDX_OJOS_FACEMESH.flags.writeable = False
+IDX_BOCA_FACEMESH.flags.writeable = False
+IDX_CABEZA_FACEMESH.flags.writeable = False
+
+# Pares de puntos cuyas distancias se necesitan, como posiciones dentro de cada
+# grupo de índices. EAR: (p1, p5) y (p2, p4) verticales, (p0, p3) horizontal
+_PARES_EAR = np.array([[1, 5], [2, 4], [0, 3]], dtype=np.intp)
+# MAR: comisura-comisura (ancho) y labio-labio (apertura), sobre IDX_BOCA_FACEMESH
+_PARES_MAR = np.array([[0, 1], [2, 3]], dtype=np.intp)
+
+
 # ==============================
 #   Estructuras de datos
 # ==============================
 
-@dataclass
+# slots=True: se crean y leen varias veces por frame; acceso por slot en lugar de __dict__
+
+@dataclass(slots=True)
 class MedidasOjos:
     ear_izquierdo: Optional[float] = None
     ear_derecho: Optional[float] = None
@@ -73,7 +110,7 @@ class MedidasOjos:
     mensaje_error: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MedidasBoca:
     mar: Optional[float] = None
     apertura_vertical_pixeles: Optional[float] = None
@@ -82,7 +119,7 @@ class MedidasBoca:
     mensaje_error: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MedidasCabeza:
     altura_relativa_nariz: Optional[float] = None
     altura_relativa_menton: Optional[float] = None
@@ -91,7 +128,7 @@ class MedidasCabeza:
     mensaje_error: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MedidasRostro:
     """
     Contenedor de todas las medidas geométricas calculadas para un frame.
@@ -107,18 +144,88 @@ class MedidasRostro:
 #   Funciones auxiliares
 # ==============================
 
-def _distancia_2d(p1: Tuple[int, int], p2: Tuple[int, int]) -> float:
-    """Distancia euclidiana 2D entre dos puntos en píxeles."""
-    return float(np.linalg.norm(np.array(p1, dtype=float) - np.array(p2, dtype=float)))
+def _indices_ojos(indices: Dict[str, Dict]) -> Optional[np.ndarray]:
+    """Array (2, 6) con los índices de ambos ojos, o None si la configuración no tiene 6 por ojo."""
+    indices_izq = list(indices["ojos"]["izquierdo"])
+    indices_der = list(indices["ojos"]["derecho"])
+    if len(indices_izq) != 6 or len(indices_der) != 6:
+        return None
+    return np.array([indices_izq, indices_der], dtype=np.intp)
+
+
+def _indices_boca(indices: Dict[str, Dict]) -> np.ndarray:
+    """Array (4,) con comisura izquierda, comisura derecha, labio superior y labio inferior."""
+    idx_boca = indices["boca"]
+    return np.array(
+        [
+            idx_boca["comisura_izquierda"],
+            idx_boca["comisura_derecha"],
+            idx_boca["labio_superior"],
+            idx_boca["labio_inferior"],
+        ],
+        dtype=np.intp,
+    )
+
+
+def _indices_cabeza(indices: Dict[str, Dict]) -> np.ndarray:
+    """Array (2,) con nariz y mentón."""
+    idx_cabeza = indices["cabeza"]
+    return np.array([idx_cabeza["nariz"], idx_cabeza["menton"]], dtype=np.intp)
+
+
+def _pares_contiguos(pares: np.ndarray) -> np.ndarray:
+    """Pares como array (K, 2) intp C-contiguo, el tipo con el que se compila _distancias_nucleo."""
+    return np.array(pares.reshape(-1, 2), dtype=np.intp)
+
 
+@njit(cache=True)
+def _distancias_nucleo(puntos, pares):
+    """
+    Distancia entre los dos puntos de cada fila de `pares` (forma (K, 2)).
+
+    Sin verificación de rango: el llamador se asegura de que los índices existan.
+    """
+    n = pares.shape[0]
+    d = np.empty(n)
+    for k in range(n):
+        i = pares[k, 0]
+        j = pares[k, 1]
+        dx = float(puntos[i, 0]) - float(puntos[j, 0])
+        dy = float(puntos[i, 1]) - float(puntos[j, 1])
+        d[k] = math.sqrt(dx * dx + dy * dy)
+    return d
+
+
+def _distancias_numpy(puntos: np.ndarray, pares: np.ndarray) -> np.ndarray:
+    """Lo mismo que _distancias_nucleo con un gather y un np.linalg.norm."""
+    pts = puntos[pares].astype(float)
+    return np.linalg.norm(pts[:, 0, :] - pts[:, 1, :], axis=-1)
 
-def _obtener_punto(puntos: List[Tuple[int, int]], indice: int) -> Tuple[int, int]:
-    """Obtiene un punto (x, y) de la lista de puntos_pixeles, con verificación de rango."""
-    if indice < 0 or indice >= len(puntos):
+
+# Con Numba, el bucle compilado evita crear arrays intermedios. Sin Numba ese
+# mismo bucle interpretado sería más lento que la versión vectorizada
+_distancias = _distancias_nucleo if NUMBA_DISPONIBLE else _distancias_numpy
+
+# Compilar (o cargar del cache en disco) al importar, con los tipos de las llamadas
+# reales (puntos_pixeles int32 del detector): si no, lo paga el primer frame con rostro
+if NUMBA_DISPONIBLE:
+    _distancias_nucleo(np.zeros((2, 2), dtype=np.int32), np.zeros((1, 2), dtype=np.intp))
+
+
+def _distancias_pares(puntos: np.ndarray, pares: np.ndarray) -> np.ndarray:
+    """
+    Distancias entre los extremos de cada par de `pares` (forma (K, 2)), con
+    verificación de rango de los índices.
+    """
+    idx_min = int(pares.min())
+    idx_max = int(pares.max())
+    if idx_min < 0 or idx_max >= len(puntos):
+        # Se informa el índice culpable: con un negativo, el máximo puede ser válido
+        fuera = idx_min if idx_min < 0 else idx_max
         raise ErrorMedidasRostro(
-            f"Índice de punto fuera de rango: {indice} (len={len(puntos)})"
+            f"Índice de punto fuera de rango: {fuera} (len={len(puntos)})"
         )
-    return puntos[indice]
+    return _distancias(puntos, pares)
 
 
 # ==============================
@@ -145,7 +252,44 @@ class CalculadorMedidasRostro:
             Permite sobre-escribir los índices por defecto de FaceMesh.
             Si es None, se usa INDICES_FACEMESH.
         """
-        self._indices = config_indices if config_indices is not None else INDICES_FACEMESH
+        # Índices como arrays para juntar los puntos de cada frame de una vez; el dict
+        # solo se lee acá. Con la configuración por defecto se reutilizan las
+        # constantes del módulo.
+        self._idx_ojos: Optional[np.ndarray]
+        if config_indices is None:
+            self._idx_ojos = IDX_OJOS_FACEMESH
+            self._idx_boca = IDX_BOCA_FACEMESH
+            self._idx_cabeza = IDX_CABEZA_FACEMESH
+        else:
+            # None si la config de ojos no es válida (se informa al calcular)
+            self._idx_ojos = _indices_ojos(config_indices)
+            self._idx_boca = _indices_boca(config_indices)
+            self._idx_cabeza = _indices_cabeza(config_indices)
+
+        # Los mismos índices agrupados por pares de distancia, como (K, 2): 6 de ojos
+        # (izquierdo y derecho, en el orden de _PARES_EAR), 2 de boca y 1 de cabeza
+        self._pares_ojos = (
+            None if self._idx_ojos is None else _pares_contiguos(self._idx_ojos[:, _PARES_EAR])
+        )
+        self._pares_boca = _pares_contiguos(self._idx_boca[_PARES_MAR])
+        self._pares_cabeza = _pares_contiguos(self._idx_cabeza)
+
+        # Los 9 pares juntos (ojos, boca, cabeza) para calcular todas las distancias
+        # con una sola llamada. None si algún grupo no es válido: entonces cada área
+        # se calcula por separado y reporta su propio error
+        self._pares_todos: Optional[np.ndarray] = None
+        self._max_idx_todos = -1
+        if self._pares_ojos is not None:
+            pares_todos = np.concatenate([self._pares_ojos, self._pares_boca, self._pares_cabeza])
+            if pares_todos.min() >= 0:
+                self._pares_todos = pares_todos
+                self._max_idx_todos = int(pares_todos.max())
+
+        # Últimas medidas calculadas y los puntos/resolución de los que salieron.
+        # Se guarda la referencia al array (no su id()) para que no pueda reciclarse
+        self._ultimos_puntos: Optional[np.ndarray] = None
+        self._ultima_resolucion: Optional[tuple] = None
+        self._ultimas_medidas: Optional[MedidasRostro] = None
 
     # ---------- API principal ----------
 
@@ -153,10 +297,27 @@ class CalculadorMedidasRostro:
         """
         Calcula todas las medidas geométricas principales a partir de DatosRostro.
 
+        Si llegan los mismos puntos_pixeles (mismo objeto) y resolución que en la
+        llamada anterior, como en los frames servidos desde el caché del detector o
+        sin inferencia, se devuelve el mismo MedidasRostro sin recalcular. El
+        resultado es compartido: no hay que modificarlo.
+
         Returns
         -------
         MedidasRostro
         """
+        # Antes de armar un MedidasRostro nuevo: en un acierto no se reserva nada.
+        # _ultimos_puntos nunca es None una vez guardadas unas medidas, y sin rostro
+        # no se reutiliza aunque lleguen los mismos puntos
+        puntos = datos_rostro.puntos_pixeles
+        if (
+            datos_rostro.rostro_presente
+            and puntos is self._ultimos_puntos
+            and self._ultimas_medidas is not None
+            and datos_rostro.resolucion == self._ultima_resolucion
+        ):
+            return self._ultimas_medidas
+
         medidas = MedidasRostro()
         medidas.rostro_presente = datos_rostro.rostro_presente
 
@@ -170,12 +331,18 @@ class CalculadorMedidasRostro:
             )
             return medidas
 
-        puntos = datos_rostro.puntos_pixeles
         ancho, alto = datos_rostro.resolucion
 
+        # Camino normal: las 9 distancias de una vez, repartidas entre las tres áreas.
+        # Si algún índice no existe en `puntos`, cada área verifica y calcula lo suyo
+        d_ojos = d_boca = d_cabeza = None
+        if self._pares_todos is not None and self._max_idx_todos < len(puntos):
+            d = _distancias(puntos, self._pares_todos)
+            d_ojos, d_boca, d_cabeza = d[:6], d[6:8], d[8:]
+
         # Cálculo de medidas de ojos (EAR)
         try:
-            medidas_ojos = self._calcular_medidas_ojos(puntos)
+            medidas_ojos = self._calcular_medidas_ojos(puntos, d_ojos)
             medidas.medidas_ojos = medidas_ojos
         except ErrorMedidasRostro as e:
             logger.warning(f"No se pudieron calcular medidas de ojos: {e}")
@@ -183,7 +350,7 @@ class CalculadorMedidasRostro:
 
         # Cálculo de medidas de boca (MAR)
         try:
-            medidas_boca = self._calcular_medidas_boca(puntos)
+            medidas_boca = self._calcular_medidas_boca(puntos, d_boca)
             medidas.medidas_boca = medidas_boca
         except ErrorMedidasRostro as e:
             logger.warning(f"No se pudieron calcular medidas de boca: {e}")
@@ -191,7 +358,7 @@ class CalculadorMedidasRostro:
 
         # Cálculo de medidas de cabeza (features simples)
         try:
-            medidas_cabeza = self._calcular_medidas_cabeza(puntos, alto)
+            medidas_cabeza = self._calcular_medidas_cabeza(puntos, alto, d_cabeza)
             medidas.medidas_cabeza = medidas_cabeza
         except ErrorMedidasRostro as e:
             logger.warning(f"No se pudieron calcular medidas de cabeza: {e}")
@@ -204,47 +371,36 @@ class CalculadorMedidasRostro:
                 "Ninguna de las medidas principales (ojos, boca, cabeza) se pudo calcular correctamente."
             )
 
+        self._ultimos_puntos = puntos
+        self._ultima_resolucion = datos_rostro.resolucion
+        self._ultimas_medidas = medidas
         return medidas
 
     # ---------- Medidas de ojos (EAR) ----------
 
-    def _calcular_medidas_ojos(self, puntos: List[Tuple[int, int]]) -> MedidasOjos:
-        idx_ojos = self._indices["ojos"]
-        indices_izq = idx_ojos["izquierdo"]  # type: ignore
-        indices_der = idx_ojos["derecho"]    # type: ignore
-
+    def _calcular_medidas_ojos(
+        self,
+        puntos: np.ndarray,
+        distancias: Optional[np.ndarray] = None
+    ) -> MedidasOjos:
         # Asegurar que tenemos 6 puntos por ojo
-        if len(indices_izq) != 6 or len(indices_der) != 6:
+        if self._pares_ojos is None:
             raise ErrorMedidasRostro("Los índices de ojos deben tener exactamente 6 puntos por ojo.")
 
-        # Ojo izquierdo
-        p0 = _obtener_punto(puntos, indices_izq[0])
-        p1 = _obtener_punto(puntos, indices_izq[1])
-        p2 = _obtener_punto(puntos, indices_izq[2])
-        p3 = _obtener_punto(puntos, indices_izq[3])
-        p4 = _obtener_punto(puntos, indices_izq[4])
-        p5 = _obtener_punto(puntos, indices_izq[5])
-
-        # Fórmula EAR clásica: (||p1-p5|| + ||p2-p4||) / (2 * ||p0-p3||)
-        ear_izq_num = _distancia_2d(p1, p5) + _distancia_2d(p2, p4)
-        ear_izq_den = 2.0 * _distancia_2d(p0, p3)
-        if ear_izq_den <= 0:
+        if distancias is None:
+            distancias = _distancias_pares(puntos, self._pares_ojos)
+
+        # Las 6 distancias de ambos ojos: forma (2, 3), columnas como _PARES_EAR
+        d = distancias.reshape(2, 3)
+        horizontales = d[:, 2]
+
+        if horizontales[0] <= 0:
             raise ErrorMedidasRostro("Distancia horizontal del ojo izquierdo es cero.")
-        ear_izq = ear_izq_num / ear_izq_den
-
-        # Ojo derecho
-        p0 = _obtener_punto(puntos, indices_der[0])
-        p1 = _obtener_punto(puntos, indices_der[1])
-        p2 = _obtener_punto(puntos, indices_der[2])
-        p3 = _obtener_punto(puntos, indices_der[3])
-        p4 = _obtener_punto(puntos, indices_der[4])
-        p5 = _obtener_punto(puntos, indices_der[5])
-
-        ear_der_num = _distancia_2d(p1, p5) + _distancia_2d(p2, p4)
-        ear_der_den = 2.0 * _distancia_2d(p0, p3)
-        if ear_der_den <= 0:
+        if horizontales[1] <= 0:
             raise ErrorMedidasRostro("Distancia horizontal del ojo derecho es cero.")
-        ear_der = ear_der_num / ear_der_den
+
+        # Fórmula EAR clásica: (||p1-p5|| + ||p2-p4||) / (2 * ||p0-p3||), para los dos ojos a la vez
+        ear_izq, ear_der = ((d[:, 0] + d[:, 1]) / (2.0 * horizontales)).tolist()
 
         ear_promedio = (ear_izq + ear_der) / 2.0
 
@@ -257,21 +413,15 @@ class CalculadorMedidasRostro:
 
     # ---------- Medidas de boca (MAR simplificado) ----------
 
-    def _calcular_medidas_boca(self, puntos: List[Tuple[int, int]]) -> MedidasBoca:
-        idx_boca = self._indices["boca"]
-
-        idx_com_izq = idx_boca["comisura_izquierda"]  # type: ignore
-        idx_com_der = idx_boca["comisura_derecha"]    # type: ignore
-        idx_lab_sup = idx_boca["labio_superior"]      # type: ignore
-        idx_lab_inf = idx_boca["labio_inferior"]      # type: ignore
-
-        com_izq = _obtener_punto(puntos, idx_com_izq)
-        com_der = _obtener_punto(puntos, idx_com_der)
-        lab_sup = _obtener_punto(puntos, idx_lab_sup)
-        lab_inf = _obtener_punto(puntos, idx_lab_inf)
-
-        ancho_boca = _distancia_2d(com_izq, com_der)
-        apertura_vertical = _distancia_2d(lab_sup, lab_inf)
+    def _calcular_medidas_boca(
+        self,
+        puntos: np.ndarray,
+        distancias: Optional[np.ndarray] = None
+    ) -> MedidasBoca:
+        # Comisura-comisura y labio-labio en una sola llamada
+        if distancias is None:
+            distancias = _distancias_pares(puntos, self._pares_boca)
+        ancho_boca, apertura_vertical = distancias.tolist()
 
         if ancho_boca <= 0:
             raise ErrorMedidasRostro("Ancho de boca es cero o negativo.")
@@ -289,25 +439,23 @@ class CalculadorMedidasRostro:
 
     def _calcular_medidas_cabeza(
         self,
-        puntos: List[Tuple[int, int]],
-        alto: int
+        puntos: np.ndarray,
+        alto: int,
+        distancias: Optional[np.ndarray] = None
     ) -> MedidasCabeza:
-        idx_cabeza = self._indices["cabeza"]
-
-        idx_nariz = idx_cabeza["nariz"]   # type: ignore
-        idx_menton = idx_cabeza["menton"] # type: ignore
-
-        nariz = _obtener_punto(puntos, idx_nariz)
-        menton = _obtener_punto(puntos, idx_menton)
-
-        distancia_nariz_menton = _distancia_2d(nariz, menton)
+        # Sin distancias precalculadas, _distancias_pares verifica el rango de
+        # nariz y mentón antes de leer sus alturas
+        if distancias is None:
+            distancias = _distancias_pares(puntos, self._pares_cabeza)
+        distancia_nariz_menton = float(distancias[0])
 
         if alto <= 0:
             raise ErrorMedidasRostro("Altura de imagen inválida.")
 
         # Alturas relativas normalizadas (0 = tope superior, 1 = borde inferior)
-        altura_rel_nariz = float(nariz[1]) / float(alto)
-        altura_rel_menton = float(menton[1]) / float(alto)
+        idx_nariz, idx_menton = self._pares_cabeza[0]
+        altura_rel_nariz = float(puntos[idx_nariz, 1]) / float(alto)
+        altura_rel_menton = float(puntos[idx_menton, 1]) / float(alto)
 
         return MedidasCabeza(
             altura_relativa_nariz=altura_rel_nariz,